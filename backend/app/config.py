@@ -4,14 +4,121 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     DATABASE_URL: str
 
+    # Connection pool settings, shared by the sync and async engines
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
     JWT_SECRET: str
     JWT_EXPIRATION_MINUTES: int
 
+    # Cache of verified tokens and their users, per worker
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
 
     GEMINI_API_KEY: str
 
+    # Model and sampling settings shared by both AI services
+    GEMINI_MODEL: str = "models/gemini-2.5-flash-lite"
+    GEMINI_TEMPERATURE: float = 0.7
+    GEMINI_TOP_P: float = 0.9
+    GEMINI_TOP_K: int = 40
+    TAILOR_MAX_OUTPUT_TOKENS: int = 8192
+    COVER_LETTER_MAX_OUTPUT_TOKENS: int = 4096
+
+    # Static prompt instructions are stored in a Gemini context cache for
+    # this long (0 disables); shorter instructions than the minimum are
+    # sent with each call instead
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS: int = 3600
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS: int = 1024
+
+    # Estimated tokens of job description sent to the model after page
+    # boilerplate is stripped; requirements are kept first. 0 disables.
+    JOB_DESCRIPTION_TOKEN_BUDGET: int = 2000
+
+    # Gemini calls in flight per worker. The limit adapts between these
+    # bounds: it grows while calls succeed and halves on quota errors.
+    GEMINI_MAX_CONCURRENCY: int = 32
+    GEMINI_MIN_CONCURRENCY: int = 1
+
+    # Client-side quota per worker, 0 to disable. Calls over the quota wait
+    # up to GEMINI_QUEUE_TIMEOUT_SECONDS, then fail with 429.
+    GEMINI_RPM: int = 4000
+    GEMINI_TPM: int = 4000000
+    GEMINI_QUEUE_TIMEOUT_SECONDS: float = 30.0
+
+    # Attempts per Gemini call on timeouts and 5xx errors, with full-jitter
+    # exponential backoff between them
+    GEMINI_MAX_ATTEMPTS: int = 3
+    GEMINI_ATTEMPT_TIMEOUT_SECONDS: float = 90.0
+    GEMINI_RETRY_BASE_SECONDS: float = 0.5
+    GEMINI_RETRY_MAX_SECONDS: float = 8.0
+
+    # Send a second identical call when the first is slower than the p95
+    # of recent calls (but at least the minimum delay); first answer wins
+    GEMINI_HEDGE_ENABLED: bool = False
+    GEMINI_HEDGE_MIN_DELAY_SECONDS: float = 2.0
+
+    # Batch tailoring: postings per request and Gemini calls per batch
+    TAILOR_BATCH_MAX_ITEMS: int = 30
+    TAILOR_BATCH_CONCURRENCY: int = 5
+
+    # Background generation jobs: "memory" runs them in the process that
+    # accepted them, "database" lets any worker process pick them up
+    JOB_QUEUE_BACKEND: str = "memory"
+    JOB_WORKERS: int = 4
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    # How long GET /jobs/{id}/events waits before giving up
+    JOB_EVENTS_TIMEOUT_SECONDS: float = 120.0
+    # Jobs still "running" this long after they started belonged to a
+    # process that died; they are queued again. Keep it well above the
+    # longest a Gemini call can take with its retries.
+    JOB_STALE_SECONDS: float = 900.0
+
+    # LaTeX to PDF compilation: engine, compiles run at once per worker,
+    # and how long a request waits for a slot or a compile before failing
+    PDF_ENGINE: str = "pdflatex"
+    PDF_WORKERS: int = 2
+    PDF_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    PDF_COMPILE_TIMEOUT_SECONDS: float = 20.0
+    PDF_MAX_SOURCE_CHARS: int = 200000
+    # Limits on each engine process
+    PDF_MEMORY_LIMIT_MB: int = 1024
+    PDF_MAX_OUTPUT_MB: int = 20
+    # Compiled PDFs by content hash, per worker. PDFs over PDF_CACHE_MAX_MB
+    # together are evicted; a single PDF over PDF_CACHE_MAX_PDF_MB isn't cached.
+    PDF_CACHE_MAX_ENTRIES: int = 256
+    PDF_CACHE_MAX_MB: int = 64
+    PDF_CACHE_MAX_PDF_MB: int = 2
+    PDF_CACHE_TTL_SECONDS: int = 86400
+    # Work and format directory; empty uses a fresh temporary directory
+    PDF_WORK_DIR: str = ""
+
+    # Largest user template accepted by /template, and limits on each
+    # render of one
+    TEMPLATE_MAX_CHARS: int = 100000
+    TEMPLATE_MAX_OUTPUT_CHARS: int = 1000000
+    TEMPLATE_MAX_LOOP_ITERATIONS: int = 100000
+    TEMPLATE_RENDER_TIMEOUT_SECONDS: float = 2.0
+
+    # Per-worker cache of master resume text for AI calls that omit it
+    RESUME_CACHE_TTL_SECONDS: int = 60
+    RESUME_CACHE_MAX_ENTRIES: int = 10000
+
+    # Every Nth saved resume version is stored in full instead of as a delta
+    RESUME_SNAPSHOT_INTERVAL: int = 10
+
+    # Tailoring result cache: "memory", "sqlite" or "none"
+    TAILOR_CACHE_BACKEND: str = "memory"
+    TAILOR_CACHE_TTL_SECONDS: int = 86400
+    TAILOR_CACHE_MAX_ENTRIES: int = 1024
+    TAILOR_CACHE_SQLITE_PATH: str = "./tailor_cache.db"
+
     class Config:
         env_file = ".env"
 
@@ -1,18 +1,79 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
+from app.pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    async_pool_metrics,
+    sync_pool_metrics,
+)
+
+
+# Async drivers used for each database backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> str:
+
+    # "postgresql://..." -> "postgresql+asyncpg://...", keeping the rest
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+
+    if dialect not in ASYNC_DRIVERS:
+        return url
+
+    return ASYNC_DRIVERS[dialect] + sep + rest
+
+
+def get_pool_options(url: str, poolclass) -> dict:
+
+    # In-memory SQLite needs its single shared connection, so it keeps
+    # SQLAlchemy's default pool
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite:")):
+        return {}
+
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
 
 
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+    **get_pool_options(settings.DATABASE_URL, InstrumentedQueuePool),
 )
+sync_pool_metrics.attach(engine)
 
 SessionLocal = sessionmaker(
     autocommit=False,  
     autoflush=False,   
     bind=engine,       
 )
+
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    **get_pool_options(settings.DATABASE_URL, InstrumentedAsyncQueuePool),
+)
+async_pool_metrics.attach(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    # Objects stay readable after commit without another round trip
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
@@ -22,3 +83,8 @@ def get_db():
         yield db  
     finally:
         db.close()  
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
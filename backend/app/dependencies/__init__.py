@@ -1 +1,3 @@
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import get_current_user, get_current_principal, Principal
+from app.dependencies.resume import resolve_master_resume
+from app.dependencies.template import resolve_template
@@ -1,20 +1,29 @@
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.user import User
+from app.services import auth_cache
 from app.services.auth import decode_jwt
 
 security = HTTPBearer()
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
-    
+
+    # For routes that write rows owned by the user: unlike the principal,
+    # this confirms the user still exists. Shares the route's session.
     token = credentials.credentials
 
+    # Tokens seen recently skip both the decode and the database lookup
+    cached_user = auth_cache.get_user(token)
+    if cached_user is not None:
+        return cached_user
+
     # Decode the JWT token
     payload = decode_jwt(token)
 
@@ -34,7 +43,7 @@ def get_current_user(
         )
 
     # Query the database for the user
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
 
     if not user:
         raise HTTPException(
@@ -42,4 +51,48 @@ def get_current_user(
             detail="User not found"
         )
 
+    # Detach the row so commits in the route cannot expire the cached copy.
+    # Routes only read column attributes from current_user.
+    db.expunge(user)
+    auth_cache.put_user(token, payload, user)
+
     return user
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+
+    # Identity taken from the signed claims written by create_jwt
+    user_id: int
+    email: str
+    exp: int
+
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+
+    # Trusts the token's signature instead of loading the User row, so
+    # routes that only need the caller's id never open a database session.
+    # Declared async because it does no I/O and needs no threadpool slot.
+    payload = decode_jwt(credentials.credentials)
+
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+
+    user_id = payload.get("user_id")
+
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload"
+        )
+
+    return Principal(
+        user_id=user_id,
+        email=payload.get("email", ""),
+        exp=payload.get("exp", 0),
+    )
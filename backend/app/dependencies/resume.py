@@ -0,0 +1,25 @@
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services import resume_store
+
+
+async def resolve_master_resume(
+    master_resume: Optional[str],
+    user_id: int,
+    db: AsyncSession
+) -> str:
+
+    # Clients may send the resume text, or leave it out and use the saved one
+    if master_resume is not None:
+        return master_resume
+
+    raw_text = await resume_store.get_master_resume_text(db, user_id)
+
+    if raw_text is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No resume found. Please upload your resume first."
+        )
+
+    return raw_text
@@ -0,0 +1,34 @@
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Template
+from app.services.template_registry import CustomTemplate, custom_template
+
+
+async def resolve_template(
+    template_id: Optional[int],
+    template_type: str,
+    user_id: int,
+    db: AsyncSession
+) -> Optional[CustomTemplate]:
+
+    # No template id means the built-in template
+    if template_id is None:
+        return None
+
+    template = await db.get(Template, template_id)
+
+    # Other users' templates look the same as missing ones
+    if template is None or template.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Template not found"
+        )
+
+    if template.template_type != template_type:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Template {template_id} is a {template.template_type} template, not {template_type}"
+        )
+
+    return custom_template(template)
@@ -1,21 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.database import engine, Base
-from app.models import User, Resume, Template
+from app.models import User, Resume, ResumeVersion, Template, GenerationJob
 from app.routers import auth
 from app.routers import resume
 from app.routers import template
 from app.routers import cover_letter 
+from app.routers import metrics
+from app.routers import jobs
+from app.services.job_queue import job_queue
+from app.services.pdf_compiler import pdf_compiler
 
 
 # Create all database tables
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    # Background generation workers live as long as the app, and so do
+    # the LaTeX work directories and preamble format
+    await job_queue.start()
+    await pdf_compiler.start()
+    yield
+    await pdf_compiler.stop()
+    await job_queue.stop()
+
+
 app = FastAPI(
     title="Job Copilot API",
     description="Backend API for the Job Copilot browser extension",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 
@@ -39,6 +58,8 @@ app.include_router(auth.router)
 app.include_router(resume.router)
 app.include_router(template.router)
 app.include_router(cover_letter.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
 
 
 @app.get("/")
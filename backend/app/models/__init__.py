@@ -1,3 +1,5 @@
 from app.models.user import User
 from app.models.resume import Resume
 from app.models.template import Template
+from app.models.resume_version import ResumeVersion
+from app.models.generation_job import GenerationJob
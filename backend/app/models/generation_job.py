@@ -0,0 +1,33 @@
+from datetime import datetime
+from sqlalchemy import Column, Index, Integer, String, Text, DateTime, ForeignKey
+from app.database import Base
+
+
+class GenerationJob(Base):
+
+    __tablename__ = "generation_jobs"
+
+    # Workers of the database queue look for the oldest queued job
+    __table_args__ = (Index("ix_generation_jobs_status_created_at", "status", "created_at"),)
+
+    # Random hex id, so job ids can't be guessed from one another
+    id = Column(String(32), primary_key=True)
+
+    # Foreign key to users table
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    # "tailor" or "cover_letter"
+    kind = Column(String(32), nullable=False)
+
+    # "queued", "running", "succeeded" or "failed"
+    status = Column(String(16), nullable=False, default="queued")
+
+    # Request and result as JSON
+    payload = Column(Text, nullable=False)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,28 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Text, Boolean, DateTime, ForeignKey, UniqueConstraint
+from app.database import Base
+
+
+class ResumeVersion(Base):
+
+    __tablename__ = "resume_versions"
+
+    # One row per saved version; (user_id, version) is indexed by the constraint
+    __table_args__ = (UniqueConstraint("user_id", "version"),)
+
+    # Primary key
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Foreign key to users table
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # 1, 2, 3, ... per user
+    version = Column(Integer, nullable=False)
+
+    # Snapshots hold the full text; other rows hold a delta against the
+    # previous version (see services/resume_versions.py)
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    content = Column(Text, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
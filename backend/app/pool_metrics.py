@@ -0,0 +1,104 @@
+import threading
+import time
+from typing import Any, Dict
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """Counters for one connection pool, fed by SQLAlchemy pool events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checked_out = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def attach(self, engine) -> None:
+
+        # Engine-level listeners also apply to pools recreated by dispose()
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+                self.checked_out += 1
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checked_out = max(self.checked_out - 1, 0)
+
+        # Fires for connections dropped by pre-ping or recycling errors
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "checkout_wait_ms_avg": (
+                    self.wait_seconds_total / self.checkouts * 1000 if self.checkouts else 0.0
+                ),
+                "checkout_wait_ms_max": self.wait_seconds_max * 1000,
+            }
+
+        # QueuePool exposes its own gauges; other pool classes do not
+        if isinstance(pool, QueuePool):
+            data["pool_size"] = pool.size()
+            data["overflow"] = max(pool.overflow(), 0)
+            data["checked_in"] = pool.checkedin()
+
+        return data
+
+
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+class _TimedCheckoutMixin:
+
+    metrics: PoolMetrics
+
+    # SQLAlchemy has no "before checkout" event, so the time spent waiting
+    # for a free connection is measured around the pool's own _do_get.
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        finally:
+            self.metrics.record_wait(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    metrics = sync_pool_metrics
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
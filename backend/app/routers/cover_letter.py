@@ -1,8 +1,10 @@
+import math
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.models import User
 from app.schemas.cover_letter import CoverLetterRequest, CoverLetterResponse
-from app.dependencies import get_current_user
+from app.database import AsyncSessionLocal
+from app.dependencies import get_current_principal, Principal, resolve_master_resume, resolve_template
 from app.services import cover_letter_service
+from app.services.ai_client import GeminiRateLimited
 
 router = APIRouter(prefix="/cover-letter", tags=["cover-letter"])
 
@@ -10,19 +12,33 @@ router = APIRouter(prefix="/cover-letter", tags=["cover-letter"])
 @router.post("/generate", response_model=CoverLetterResponse)
 async def generate_cover_letter(
     request: CoverLetterRequest,
-    current_user: User = Depends(get_current_user)
+    principal: Principal = Depends(get_current_principal)
 ):
 
+    # Released before the model call rather than held for the whole request
+    async with AsyncSessionLocal() as db:
+        master_resume = await resolve_master_resume(request.master_resume, principal.user_id, db)
+        template = await resolve_template(request.template_id, "cover_letter", principal.user_id, db)
+
     try:
         result = await cover_letter_service.generate_cover_letter(
             job_description=request.job_description,
-            master_resume=request.master_resume,
+            master_resume=master_resume,
             company_name=request.company_name,
-            job_title=request.job_title
+            job_title=request.job_title,
+            template=template
         )
 
         return result
 
+    except GeminiRateLimited as e:
+        # Over the Gemini quota: tell the client when to come back
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
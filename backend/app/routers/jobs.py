@@ -0,0 +1,128 @@
+import json
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal, get_async_db
+from app.models import GenerationJob, User
+from app.schemas.cover_letter import CoverLetterRequest
+from app.schemas.job import JobResponse, JobSubmitted
+from app.schemas.resume import TailorRequest
+from app.dependencies import get_current_principal, get_current_user, Principal, resolve_master_resume, resolve_template
+from app.services.job_queue import job_queue
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def _job_response(job: GenerationJob) -> JobResponse:
+
+    return JobResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        result=json.loads(job.result) if job.result else None,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+async def _get_own_job(db: AsyncSession, job_id: str, principal: Principal) -> GenerationJob:
+
+    job = await job_queue.get(db, job_id)
+
+    # Other users' jobs look the same as missing ones
+    if job is None or job.user_id != principal.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return job
+
+
+@router.post("/tailor", response_model=JobSubmitted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_tailor_job(
+    request: TailorRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    # get_current_user rather than the principal: the job row belongs to
+    # the user, so the user has to still exist
+    master_resume = await resolve_master_resume(request.master_resume, current_user.id, db)
+    template = await resolve_template(request.template_id, "resume", current_user.id, db)
+
+    # The template is stored as it is now, so later edits don't change a queued job
+    job = await job_queue.submit(db, current_user.id, "tailor", {
+        "job_description": request.job_description,
+        "master_resume": master_resume,
+        "template": asdict(template) if template else None,
+    })
+
+    return JobSubmitted(id=job.id, status=job.status)
+
+
+@router.post("/cover-letter", response_model=JobSubmitted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_cover_letter_job(
+    request: CoverLetterRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    master_resume = await resolve_master_resume(request.master_resume, current_user.id, db)
+    template = await resolve_template(request.template_id, "cover_letter", current_user.id, db)
+
+    job = await job_queue.submit(db, current_user.id, "cover_letter", {
+        "job_description": request.job_description,
+        "master_resume": master_resume,
+        "company_name": request.company_name,
+        "job_title": request.job_title,
+        "template": asdict(template) if template else None,
+    })
+
+    return JobSubmitted(id=job.id, status=job.status)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    job = await _get_own_job(db, job_id, principal)
+    return _job_response(job)
+
+
+@router.get("/{job_id}/events")
+async def job_events(
+    job_id: str,
+    principal: Principal = Depends(get_current_principal)
+):
+
+    # No request-scoped session: it would keep a pooled connection for as
+    # long as the stream stays open
+    async with AsyncSessionLocal() as db:
+        await _get_own_job(db, job_id, principal)
+
+    async def event_stream():
+        # A single event once the job has finished, or "timeout" so the
+        # client can fall back to polling GET /jobs/{id}
+        job = await job_queue.wait(job_id, settings.JOB_EVENTS_TIMEOUT_SECONDS)
+
+        if job is not None and job.status in ("succeeded", "failed"):
+            yield f"event: {job.status}\ndata: {_job_response(job).model_dump_json()}\n\n"
+        else:
+            yield f"event: timeout\ndata: {json.dumps({'id': job_id})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
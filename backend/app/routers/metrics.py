@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from app.database import engine, async_engine
+from app.pool_metrics import sync_pool_metrics, async_pool_metrics
+from app.services import ai_client, ai_service, job_description
+from app.services.pdf_compiler import pdf_compiler
+from app.services.tailor_cache import tailor_cache
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+def get_metrics():
+
+    return {
+        "tailor_cache": tailor_cache.stats(),
+        "tailor_in_flight": ai_service.in_flight_stats(),
+        "gemini": ai_client.stats(),
+        "job_description": job_description.stats(),
+        "pdf": pdf_compiler.stats(),
+        "db_pool": {
+            "sync": sync_pool_metrics.snapshot(engine.pool),
+            "async": async_pool_metrics.snapshot(async_engine.pool),
+        },
+    }
@@ -1,21 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+import json
+import math
+from typing import Any, Dict, List, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal, get_async_db
 from app.models import Resume, User
-from app.schemas.resume import ResumeCreate, ResumeResponse, TailorRequest, TailorResponse
-from app.dependencies import get_current_user
-from app.services import ai_service
+from app.schemas.resume import (
+    PdfRequest,
+    ResumeCreate,
+    ResumeResponse,
+    ResumeVersionResponse,
+    ResumeVersionSummary,
+    TailorBatchItem,
+    TailorBatchRequest,
+    TailorBatchResponse,
+    TailorRequest,
+    TailorResponse,
+)
+from app.dependencies import get_current_principal, get_current_user, Principal, resolve_master_resume, resolve_template
+from app.services import ai_service, resume_store, resume_versions
+from app.services.ai_client import GeminiRateLimited
+from app.services.pdf_compiler import LatexCompileError, PdfCompilerUnavailable, pdf_compiler, pdf_key
 
 router = APIRouter(prefix="/resume", tags=["resume"])
 
 
 @router.get("/master", response_model=ResumeResponse)
-def get_master_resume(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_master_resume(
+    response: Response,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Header(None)
 ):
-    
-    resume = db.query(Resume).filter(Resume.user_id == current_user.id).first()
+
+    result = await db.execute(select(Resume).where(Resume.user_id == principal.user_id))
+    resume = result.scalar_one_or_none()
 
     if not resume:
         raise HTTPException(
@@ -23,44 +47,47 @@ def get_master_resume(
             detail="No resume found. Please upload your resume first."
         )
 
+    # Let clients that already hold this version skip the download
+    etag = resume_store.resume_etag(resume)
+    if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return resume
 
 
 @router.put("/master", response_model=ResumeResponse)
-def create_or_update_master_resume(
+async def create_or_update_master_resume(
     resume_data: ResumeCreate,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
 
-    # Check if user already has a resume
-    existing_resume = db.query(Resume).filter(Resume.user_id == current_user.id).first()
-
-    if existing_resume:
-        # Update existing resume
-        existing_resume.raw_text = resume_data.raw_text
-        db.commit()
-        db.refresh(existing_resume)
-        return existing_resume
-    else:
-        # Create new resume
-        new_resume = Resume(
+    try:
+        resume = await resume_store.upsert_master_resume(
+            db,
             user_id=current_user.id,
             raw_text=resume_data.raw_text
         )
-        db.add(new_resume)
-        db.commit()
-        db.refresh(new_resume)
-        return new_resume
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Resume was saved concurrently, please retry"
+        )
+
+    response.headers["ETag"] = resume_store.resume_etag(resume)
+    return resume
 
 
 @router.delete("/master", status_code=status.HTTP_204_NO_CONTENT)
-def delete_master_resume(
+async def delete_master_resume(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
 
-    resume = db.query(Resume).filter(Resume.user_id == current_user.id).first()
+    result = await db.execute(select(Resume).where(Resume.user_id == current_user.id))
+    resume = result.scalar_one_or_none()
 
     if not resume:
         raise HTTPException(
@@ -68,27 +95,84 @@ def delete_master_resume(
             detail="No resume found to delete."
         )
 
-    db.delete(resume)
-    db.commit()
+    await db.delete(resume)
+    await resume_versions.delete_versions(db, current_user.id)
+    await db.commit()
+
+    resume_store.invalidate_master_resume(current_user.id)
 
     return None
 
 
+@router.get("/master/versions", response_model=List[ResumeVersionSummary])
+async def list_master_resume_versions(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    # Newest first. The current version is also served by GET /resume/master.
+    return await resume_versions.list_versions(db, principal.user_id)
+
+
+@router.get("/master/versions/{version}", response_model=ResumeVersionResponse)
+async def get_master_resume_version(
+    version: int,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    found = await resume_versions.get_version(db, principal.user_id, version)
+
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Resume version {version} not found."
+        )
+
+    row, raw_text = found
+
+    return ResumeVersionResponse(
+        version=row.version,
+        raw_text=raw_text,
+        created_at=row.created_at
+    )
+
+
 @router.post("/tailor", response_model=TailorResponse)
 async def tailor_resume(
     request: TailorRequest,
-    current_user: User = Depends(get_current_user)
+    principal: Principal = Depends(get_current_principal),
+    cache_control: Optional[str] = Header(None)
 ):
-    
+
+    # No request-scoped session: it would keep a pooled connection for the
+    # whole model call, so the pool size would cap concurrent generations
+    async with AsyncSessionLocal() as db:
+        master_resume = await resolve_master_resume(request.master_resume, principal.user_id, db)
+        template = await resolve_template(request.template_id, "resume", principal.user_id, db)
+
+    # "Cache-Control: no-cache" forces a fresh generation
+    use_cache = "no-cache" not in (cache_control or "").lower()
+
     try:
         # Call the AI service to tailor the resume
         result = await ai_service.tailor_resume(
             job_description=request.job_description,
-            master_resume=request.master_resume
+            master_resume=master_resume,
+            use_cache=use_cache,
+            template=template
         )
 
         return result
 
+    except GeminiRateLimited as e:
+        # Over the Gemini quota: tell the client when to come back
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+
     except ValueError as e:
         # JSON parsing error from AI service
         raise HTTPException(
@@ -102,3 +186,173 @@ async def tailor_resume(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to tailor resume: {str(e)}"
         )
+
+
+@router.post("/tailor/stream")
+async def tailor_resume_stream(
+    request: TailorRequest,
+    principal: Principal = Depends(get_current_principal),
+    cache_control: Optional[str] = Header(None)
+):
+
+    async with AsyncSessionLocal() as db:
+        master_resume = await resolve_master_resume(request.master_resume, principal.user_id, db)
+        template = await resolve_template(request.template_id, "resume", principal.user_id, db)
+
+    use_cache = "no-cache" not in (cache_control or "").lower()
+
+    async def event_stream():
+        try:
+            async for event, data in ai_service.tailor_resume_stream(
+                job_description=request.job_description,
+                master_resume=master_resume,
+                use_cache=use_cache,
+                template=template
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+        except Exception as e:
+            # Headers are already sent, so errors travel as an SSE event
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+def _check_batch_size(request: TailorBatchRequest) -> None:
+
+    if len(request.job_descriptions) > settings.TAILOR_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"A batch can hold at most {settings.TAILOR_BATCH_MAX_ITEMS} job descriptions"
+        )
+
+
+def _batch_item(index: int, outcome: Union[Dict[str, Any], Exception]) -> TailorBatchItem:
+
+    if isinstance(outcome, Exception):
+        return TailorBatchItem(index=index, error=f"Failed to tailor resume: {str(outcome)}")
+
+    # Checked per item so one malformed response doesn't fail the batch
+    try:
+        return TailorBatchItem(index=index, result=TailorResponse.model_validate(outcome))
+    except ValidationError as e:
+        return TailorBatchItem(index=index, error=f"AI service returned invalid response: {str(e)}")
+
+
+@router.post("/tailor/batch", response_model=TailorBatchResponse)
+async def tailor_resume_batch(
+    request: TailorBatchRequest,
+    principal: Principal = Depends(get_current_principal),
+    cache_control: Optional[str] = Header(None)
+):
+
+    _check_batch_size(request)
+    async with AsyncSessionLocal() as db:
+        master_resume = await resolve_master_resume(request.master_resume, principal.user_id, db)
+        template = await resolve_template(request.template_id, "resume", principal.user_id, db)
+
+    use_cache = "no-cache" not in (cache_control or "").lower()
+
+    results: List[Optional[TailorBatchItem]] = [None] * len(request.job_descriptions)
+
+    async for indexes, outcome in ai_service.tailor_resume_batch(
+        job_descriptions=request.job_descriptions,
+        master_resume=master_resume,
+        use_cache=use_cache,
+        template=template
+    ):
+        for index in indexes:
+            results[index] = _batch_item(index, outcome)
+
+    return TailorBatchResponse(results=results)
+
+
+@router.post("/tailor/batch/stream")
+async def tailor_resume_batch_stream(
+    request: TailorBatchRequest,
+    principal: Principal = Depends(get_current_principal),
+    cache_control: Optional[str] = Header(None)
+):
+
+    _check_batch_size(request)
+    async with AsyncSessionLocal() as db:
+        master_resume = await resolve_master_resume(request.master_resume, principal.user_id, db)
+        template = await resolve_template(request.template_id, "resume", principal.user_id, db)
+
+    use_cache = "no-cache" not in (cache_control or "").lower()
+
+    async def event_stream():
+        # One "result" event per posting as it finishes, then "done"
+        async for indexes, outcome in ai_service.tailor_resume_batch(
+            job_descriptions=request.job_descriptions,
+            master_resume=master_resume,
+            use_cache=use_cache,
+            template=template
+        ):
+            for index in indexes:
+                yield f"event: result\ndata: {_batch_item(index, outcome).model_dump_json()}\n\n"
+
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.post("/pdf")
+async def compile_resume_pdf(
+    request: PdfRequest,
+    principal: Principal = Depends(get_current_principal),
+    if_none_match: Optional[str] = Header(None)
+):
+
+    if len(request.latex) > settings.PDF_MAX_SOURCE_CHARS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"LaTeX source can be at most {settings.PDF_MAX_SOURCE_CHARS} characters"
+        )
+
+    # The PDF is named by its source, so a client holding it can skip the compile
+    etag = f'"{pdf_key(request.latex)}"'
+    if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    try:
+        pdf = await pdf_compiler.compile(request.latex)
+
+    except PdfCompilerUnavailable as e:
+        headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers=headers
+        )
+
+    except LatexCompileError as e:
+        # The log tail is what the user needs to fix the document
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": str(e), "log": e.log}
+        )
+
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={
+            "ETag": etag,
+            "Content-Disposition": 'inline; filename="resume.pdf"',
+        },
+    )
@@ -1,5 +1,17 @@
-from fastapi import APIRouter
+import asyncio
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from jinja2 import TemplateError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
+from app.dependencies import get_current_principal, get_current_user, Principal
+from app.models import Template, User
+from app.schemas.template import TemplateCreate, TemplateResponse
+from app.services.cover_letter_templates import DEFAULT_COVER_LETTER_TEMPLATE
 from app.services.default_templates import DEFAULT_RESUME_TEMPLATE
+from app.services.template_registry import validate_template
 
 router = APIRouter(prefix="/template", tags=["template"])
 
@@ -11,3 +23,133 @@ def get_resume_template():
         "template_type": "resume",
         "content": DEFAULT_RESUME_TEMPLATE
     }
+
+
+@router.get("/cover-letter")
+def get_cover_letter_template():
+    # Get the default LaTeX cover letter template.
+    return {
+        "template_type": "cover_letter",
+        "content": DEFAULT_COVER_LETTER_TEMPLATE
+    }
+
+
+async def _check_template(template_data: TemplateCreate) -> None:
+
+    if len(template_data.content) > settings.TEMPLATE_MAX_CHARS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"A template can be at most {settings.TEMPLATE_MAX_CHARS} characters"
+        )
+
+    # Rejected at upload rather than on the first tailoring request.
+    # Compiling a large template takes a while, so it runs off the event loop.
+    try:
+        await asyncio.to_thread(validate_template, template_data.content)
+    except TemplateError as e:
+        line = getattr(e, "lineno", None)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Template does not compile{f' (line {line})' if line else ''}: {e.message}"
+        )
+    except RecursionError:
+        # Deep nesting overflows Jinja's recursive parser and compiler
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Template does not compile: it is nested too deeply"
+        )
+
+
+async def _get_own_template(db: AsyncSession, template_id: int, principal: Principal) -> Template:
+
+    template = await db.get(Template, template_id)
+
+    # Other users' templates look the same as missing ones
+    if template is None or template.user_id != principal.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Template not found"
+        )
+
+    return template
+
+
+@router.get("", response_model=List[TemplateResponse])
+async def list_templates(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    result = await db.execute(
+        select(Template)
+        .where(Template.user_id == principal.user_id)
+        .order_by(Template.id)
+    )
+    return result.scalars().all()
+
+
+@router.post("", response_model=TemplateResponse, status_code=status.HTTP_201_CREATED)
+async def create_template(
+    template_data: TemplateCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    await _check_template(template_data)
+
+    template = Template(
+        user_id=current_user.id,
+        template_type=template_data.template_type,
+        content=template_data.content
+    )
+    db.add(template)
+    await db.commit()
+    await db.refresh(template)
+
+    return template
+
+
+@router.get("/{template_id}", response_model=TemplateResponse)
+async def get_template(
+    template_id: int,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    return await _get_own_template(db, template_id, principal)
+
+
+@router.put("/{template_id}", response_model=TemplateResponse)
+async def update_template(
+    template_id: int,
+    template_data: TemplateCreate,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    await _check_template(template_data)
+
+    template = await _get_own_template(db, template_id, principal)
+    template.template_type = template_data.template_type
+    template.content = template_data.content
+
+    # updated_at moves on, so compiled copies in other workers go stale
+    await db.commit()
+    await db.refresh(template)
+
+    return template
+
+
+@router.delete("/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_template(
+    template_id: int,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+
+    template = await _get_own_template(db, template_id, principal)
+
+    await db.delete(template)
+    await db.commit()
+
+    return None
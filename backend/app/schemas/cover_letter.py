@@ -1,12 +1,15 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class CoverLetterRequest(BaseModel):
     job_description: str
-    master_resume: str
+    # Omit to use the master resume saved with PUT /resume/master
+    master_resume: Optional[str] = None
     company_name: str = ""
     job_title: str = ""
+    # One of the user's templates from /template; omit for the default
+    template_id: Optional[int] = None
 
 
 class CoverLetterResponse(BaseModel):
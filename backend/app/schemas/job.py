@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+class JobSubmitted(BaseModel):
+    id: str
+    status: str
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str  # "tailor" or "cover_letter"
+    status: str  # "queued", "running", "succeeded" or "failed"
+    # Same shape as the /resume/tailor or /cover-letter/generate response
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 
 class ResumeBase(BaseModel):
@@ -26,11 +26,31 @@ class ResumeResponse(ResumeBase):
         from_attributes = True
 
 
+class ResumeVersionSummary(BaseModel):
+
+    version: int
+    is_snapshot: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ResumeVersionResponse(BaseModel):
+
+    version: int
+    raw_text: str
+    created_at: datetime
+
+
 # Tailor Resume Schemas
 
 class TailorRequest(BaseModel):
     job_description: str
-    master_resume: str
+    # Omit to use the master resume saved with PUT /resume/master
+    master_resume: Optional[str] = None
+    # One of the user's templates from /template; omit for the default
+    template_id: Optional[int] = None
 
 
 class ChangeDetail(BaseModel):
@@ -45,4 +65,27 @@ class TailorResponse(BaseModel):
     keywords_matched: List[str]
     keywords_missing: List[str]
     keyword_variants_used: List[str]
-    clarifying_questions: List[str]  
+    clarifying_questions: List[str]
+
+
+class TailorBatchRequest(BaseModel):
+    job_descriptions: List[str] = Field(..., min_length=1)
+    master_resume: Optional[str] = None
+    # One of the user's templates from /template; omit for the default
+    template_id: Optional[int] = None
+
+
+class TailorBatchItem(BaseModel):
+    index: int  # Position in job_descriptions
+    result: Optional[TailorResponse] = None
+    error: Optional[str] = None
+
+
+class TailorBatchResponse(BaseModel):
+    results: List[TailorBatchItem]  # In request order
+
+
+class PdfRequest(BaseModel):
+
+    # Usually tailored_resume_latex from /resume/tailor
+    latex: str
@@ -1,5 +1,16 @@
+from . import ai_client
 from . import ai_service
 from . import auth
 from . import cover_letter_service
 from . import cover_letter_renderer
+from . import latex_escape
 from . import latex_renderer
+from . import tailor_cache
+from . import template_registry
+from . import json_stream
+from . import auth_cache
+from . import resume_store
+from . import resume_versions
+from . import job_queue
+from . import rate_limit
+from . import job_description
@@ -0,0 +1,442 @@
+import asyncio
+import collections
+import datetime
+import hashlib
+import json
+import random
+import time
+import google.generativeai as genai
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple, Type
+from google.api_core.exceptions import (
+    DeadlineExceeded,
+    InternalServerError,
+    ResourceExhausted,
+    ServiceUnavailable,
+)
+from pydantic import BaseModel
+from app.config import settings
+from app.services.rate_limit import AdaptiveLimiter, RateLimited, TokenBucket, WaitStats
+
+
+class GeminiRateLimited(RateLimited):
+    """The call was throttled, here or by Gemini. Routers answer with 429."""
+
+
+# The only place the SDK is configured. Every model below shares its
+# default async client, and with it the open connections to the API.
+genai.configure(api_key=settings.GEMINI_API_KEY)
+
+# Models by (name, generation config, instruction hash), with the time
+# they have to be rebuilt because their context cache runs out
+_models: Dict[Tuple[str, str, str], Tuple[genai.GenerativeModel, float]] = {}
+
+# Context caches by (name, instruction hash), shared by every generation
+# config; None where caching isn't available
+_contexts: Dict[Tuple[str, str], Tuple[Optional[Any], float]] = {}
+
+_locks: Dict[Tuple, asyncio.Lock] = {}
+
+_context_caches = {"created": 0, "failed": 0}
+_prompt_tokens = 0
+_cached_prompt_tokens = 0
+_output_tokens = 0
+
+
+def response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+
+    # Gemini takes a subset of OpenAPI: no $refs, titles or defaults, and
+    # "nullable" instead of anyOf with null
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+
+    def convert(node: Dict[str, Any]) -> Dict[str, Any]:
+        if "$ref" in node:
+            return convert(definitions[node["$ref"].rsplit("/", 1)[-1]])
+
+        if "anyOf" in node:
+            options = [option for option in node["anyOf"] if option.get("type") != "null"]
+            converted = convert(options[0])
+            if len(options) < len(node["anyOf"]):
+                converted["nullable"] = True
+            return converted
+
+        converted = {"type": node["type"]}
+        if "properties" in node:
+            converted["properties"] = {name: convert(value) for name, value in node["properties"].items()}
+            converted["required"] = node.get("required", [])
+        if "items" in node:
+            converted["items"] = convert(node["items"])
+        if "enum" in node:
+            converted["enum"] = node["enum"]
+        return converted
+
+    return convert(schema)
+
+
+async def get_model(
+    model_name: str,
+    generation_config: Dict[str, Any],
+    system_instruction: str,
+) -> genai.GenerativeModel:
+
+    # The hash ties the context cache to the instruction text: editing the
+    # template makes a new key, and the old cache simply expires.
+    version = hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()[:16]
+    key = (model_name, json.dumps(generation_config, sort_keys=True), version)
+
+    entry = _models.get(key)
+    if entry is not None and time.monotonic() < entry[1]:
+        return entry[0]
+
+    # One caller builds the model; concurrent ones wait for it
+    async with _locks.setdefault(key, asyncio.Lock()):
+        entry = _models.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+
+        cached, expires = await _get_context(model_name, system_instruction, version)
+
+        if cached is not None:
+            model = genai.GenerativeModel.from_cached_content(cached, generation_config=generation_config)
+        else:
+            # The instruction goes out with every call. It still leads the
+            # request, so Gemini's implicit prefix caching can pick it up.
+            model = genai.GenerativeModel(
+                model_name,
+                generation_config=generation_config,
+                system_instruction=system_instruction,
+            )
+
+        _models[key] = (model, expires)
+        return model
+
+
+async def _get_context(model_name: str, system_instruction: str, version: str) -> Tuple[Optional[Any], float]:
+
+    key = (model_name, version)
+
+    async with _locks.setdefault(key, asyncio.Lock()):
+        entry = _contexts.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry
+
+        entry = await _create_context(model_name, system_instruction, version)
+        _contexts[key] = entry
+        return entry
+
+
+async def _create_context(model_name: str, system_instruction: str, version: str) -> Tuple[Optional[Any], float]:
+
+    ttl = settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS
+    now = time.monotonic()
+
+    # Gemini only caches contexts above a minimum size
+    if ttl and estimate_tokens(system_instruction) >= settings.GEMINI_CONTEXT_CACHE_MIN_TOKENS:
+        try:
+            cached = await asyncio.to_thread(
+                genai.caching.CachedContent.create,
+                model=model_name,
+                display_name=f"job-copilot-{version}",
+                system_instruction=system_instruction,
+                ttl=datetime.timedelta(seconds=ttl),
+            )
+            _context_caches["created"] += 1
+
+            # Rebuilt a little before Gemini drops the cache
+            return cached, now + ttl * 0.9
+
+        except Exception as e:
+            _context_caches["failed"] += 1
+            print(f"Context caching unavailable for {model_name}, sending the instruction with each call: {e}")
+
+    # Caching is tried again after the TTL
+    return None, now + ttl if ttl else float("inf")
+
+
+# Shared by every Gemini call of this worker. Calls over the quota or the
+# concurrency limit wait here, up to GEMINI_QUEUE_TIMEOUT_SECONDS, instead
+# of failing upstream.
+_requests = TokenBucket(settings.GEMINI_RPM) if settings.GEMINI_RPM else None
+_tokens = TokenBucket(settings.GEMINI_TPM) if settings.GEMINI_TPM else None
+_limiter = AdaptiveLimiter(
+    initial=settings.GEMINI_MAX_CONCURRENCY,
+    minimum=settings.GEMINI_MIN_CONCURRENCY,
+    maximum=settings.GEMINI_MAX_CONCURRENCY,
+)
+_stats = WaitStats()
+_waiting = 0
+
+# Errors worth another attempt. Quota errors (ResourceExhausted) are
+# handled by admission instead.
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    DeadlineExceeded,
+    InternalServerError,
+    ServiceUnavailable,
+)
+
+# Latencies of recent successful calls, for the hedging delay
+_latencies: Deque[float] = collections.deque(maxlen=200)
+HEDGE_MIN_SAMPLES = 20
+
+_retries = 0
+_hedges = 0
+_hedge_wins = 0
+
+
+def estimate_tokens(prompt: str) -> int:
+
+    # Gemini averages about four characters per token for English text
+    return len(prompt) // 4 + 1
+
+
+@asynccontextmanager
+async def _admitted(prompt: str, deadline: float):
+
+    global _waiting
+
+    estimate = estimate_tokens(prompt)
+    started = time.monotonic()
+
+    _waiting += 1
+    try:
+        if _requests is not None:
+            await _requests.acquire(1, deadline)
+        if _tokens is not None:
+            await _tokens.acquire(estimate, deadline)
+        await _limiter.acquire(deadline)
+
+    except RateLimited as e:
+        _stats.rejected += 1
+        raise GeminiRateLimited(str(e), retry_after=e.retry_after)
+
+    finally:
+        _waiting -= 1
+
+    _stats.record(time.monotonic() - started)
+
+    try:
+        yield estimate
+    finally:
+        _limiter.release()
+
+
+def _settle(response: Any, estimate: int) -> None:
+
+    # Charge the token bucket for what the call actually used
+    _limiter.succeeded()
+
+    global _prompt_tokens, _cached_prompt_tokens, _output_tokens
+
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+
+    total = getattr(usage, "total_token_count", 0)
+    if _tokens is not None and total:
+        _tokens.debit(total - estimate)
+
+    # Input tokens served from a context cache are billed at a discount
+    _prompt_tokens += getattr(usage, "prompt_token_count", 0)
+    _cached_prompt_tokens += getattr(usage, "cached_content_token_count", 0)
+    _output_tokens += getattr(usage, "candidates_token_count", 0)
+
+
+def _overloaded(e: ResourceExhausted, deadline: float) -> None:
+
+    # Gemini answered 429: shrink the limit and send the call back through
+    # admission, unless it has run out of time to wait
+    _limiter.overloaded()
+    _stats.throttled += 1
+
+    if time.monotonic() + _limiter.cooldown > deadline:
+        raise GeminiRateLimited(f"Gemini quota exceeded: {e}", retry_after=_limiter.cooldown)
+
+
+def _backoff_delay(attempt: int) -> float:
+
+    # Full jitter keeps retries from many requests from landing together
+    cap = min(settings.GEMINI_RETRY_MAX_SECONDS, settings.GEMINI_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    return random.uniform(0, cap)
+
+
+async def _retry_pause(attempt: int, e: Exception) -> None:
+
+    global _retries
+
+    _retries += 1
+    delay = _backoff_delay(attempt)
+    print(f"Gemini call failed ({type(e).__name__}: {e}), retry {attempt} in {delay:.2f}s")
+    await asyncio.sleep(delay)
+
+
+def _hedge_delay() -> Optional[float]:
+
+    # p95 of recent calls, so about one call in twenty gets a hedge
+    if not settings.GEMINI_HEDGE_ENABLED or len(_latencies) < HEDGE_MIN_SAMPLES:
+        return None
+
+    ordered = sorted(_latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return max(p95, settings.GEMINI_HEDGE_MIN_DELAY_SECONDS)
+
+
+async def _attempt(
+    model: genai.GenerativeModel,
+    prompt: str,
+):
+
+    deadline = time.monotonic() + settings.GEMINI_QUEUE_TIMEOUT_SECONDS
+
+    while True:
+        async with _admitted(prompt, deadline) as estimate:
+            started = time.monotonic()
+
+            # Uses the SDK's async client so the event loop keeps serving
+            # other requests while the model is generating.
+            try:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt),
+                    settings.GEMINI_ATTEMPT_TIMEOUT_SECONDS,
+                )
+            except ResourceExhausted as e:
+                _overloaded(e, deadline)
+                continue
+
+            _latencies.append(time.monotonic() - started)
+            _settle(response, estimate)
+            return response
+
+
+async def _hedged(
+    model: genai.GenerativeModel,
+    prompt: str,
+):
+
+    # Starts a second identical call when the first is slower than usual
+    # and returns whichever answers first
+    global _hedges, _hedge_wins
+
+    primary = asyncio.create_task(_attempt(model, prompt))
+    tasks = {primary}
+
+    try:
+        delay = _hedge_delay()
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                _hedges += 1
+                tasks.add(asyncio.create_task(_attempt(model, prompt)))
+
+        error: Optional[BaseException] = None
+
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        _hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+
+        raise error
+
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def generate_content(
+    model: genai.GenerativeModel,
+    prompt: str,
+):
+
+    for attempt in range(1, settings.GEMINI_MAX_ATTEMPTS + 1):
+        try:
+            return await _hedged(model, prompt)
+        except RETRYABLE_ERRORS as e:
+            if attempt == settings.GEMINI_MAX_ATTEMPTS:
+                raise
+            await _retry_pause(attempt, e)
+
+
+async def _stream_attempt(
+    model: genai.GenerativeModel,
+    prompt: str,
+) -> AsyncIterator[str]:
+
+    deadline = time.monotonic() + settings.GEMINI_QUEUE_TIMEOUT_SECONDS
+
+    while True:
+        # Holds its concurrency slot for the whole stream
+        async with _admitted(prompt, deadline) as estimate:
+            # The attempt timeout applies to the call and to each chunk, so
+            # a stalled stream gives its slot back and can be retried
+            try:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, stream=True),
+                    settings.GEMINI_ATTEMPT_TIMEOUT_SECONDS,
+                )
+            except ResourceExhausted as e:
+                _overloaded(e, deadline)
+                continue
+
+            chunks = response.__aiter__()
+
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), settings.GEMINI_ATTEMPT_TIMEOUT_SECONDS)
+                except StopAsyncIteration:
+                    break
+
+                # The final chunk may only carry the finish reason
+                if chunk.parts:
+                    yield chunk.text
+
+            _settle(response, estimate)
+            return
+
+
+async def stream_content(
+    model: genai.GenerativeModel,
+    prompt: str,
+) -> AsyncIterator[str]:
+
+    # Retried only until the first chunk is out; after that the client has
+    # seen part of the answer and the error is passed on
+    for attempt in range(1, settings.GEMINI_MAX_ATTEMPTS + 1):
+        started = False
+
+        try:
+            async for text in _stream_attempt(model, prompt):
+                started = True
+                yield text
+            return
+
+        except RETRYABLE_ERRORS as e:
+            if started or attempt == settings.GEMINI_MAX_ATTEMPTS:
+                raise
+            await _retry_pause(attempt, e)
+
+
+def stats() -> Dict[str, Any]:
+
+    return {
+        "waiting": _waiting,
+        "in_flight": _limiter.in_flight,
+        "concurrency_limit": int(_limiter.limit),
+        "rpm_tokens": _requests.tokens if _requests is not None else None,
+        "tpm_tokens": _tokens.tokens if _tokens is not None else None,
+        **_stats.snapshot(),
+        "retries": _retries,
+        "hedges": _hedges,
+        "hedge_wins": _hedge_wins,
+        "hedge_delay_seconds": _hedge_delay(),
+        "context_caches_created": _context_caches["created"],
+        "context_caches_failed": _context_caches["failed"],
+        "prompt_tokens": _prompt_tokens,
+        "cached_prompt_tokens": _cached_prompt_tokens,
+        "output_tokens": _output_tokens,
+    }
@@ -1,57 +1,326 @@
-import json
-import google.generativeai as genai
-from typing import Dict, Any
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from pydantic import BaseModel, ValidationError
 from app.config import settings
-from app.services.latex_renderer import render_latex, parse_resume_data
-from .prompt import get_prompt
+from app.schemas.resume import ChangeDetail
+from app.services.ai_client import (
+    GeminiRateLimited,
+    generate_content,
+    get_model,
+    response_schema,
+    stream_content,
+)
+from app.services.job_description import compact_job_description
+from app.services.json_stream import StreamingJSONParser, parse_json_document
+from app.services.latex_renderer import ResumeData, render_latex
+from app.services.tailor_cache import tailor_cache, make_cache_key, normalize_job_description
+from app.services.template_registry import CustomTemplate, render_off_loop
+from .prompt import get_prompt, PROMPT_VERSION, SYSTEM_INSTRUCTION
 
 
-# Configure Gemini API
-genai.configure(api_key=settings.GEMINI_API_KEY)
+MODEL_NAME = settings.GEMINI_MODEL
+
+# List fields of the response. The stream endpoint sends each one as its own
+# event, and a truncated response gets them filled in as empty lists.
+SUMMARY_FIELDS = (
+    "changes_made",
+    "keywords_matched",
+    "keywords_missing",
+    "keyword_variants_used",
+    "clarifying_questions",
+)
+
+
+class TailorOutput(BaseModel):
+    """The JSON object the model is asked to return."""
+
+    tailored_resume: str
+    resume_data: ResumeData
+    changes_made: List[ChangeDetail]
+    keywords_matched: List[str]
+    keywords_missing: List[str]
+    keyword_variants_used: List[str]
+    clarifying_questions: List[str]
+
+
+# Streamed calls rely on the prompt for field order, so tailored_resume
+# comes first; this SDK can't set the order of a response_schema.
+STREAM_GENERATION_CONFIG = {
+    "temperature": settings.GEMINI_TEMPERATURE,
+    "top_p": settings.GEMINI_TOP_P,
+    "top_k": settings.GEMINI_TOP_K,
+    "max_output_tokens": settings.TAILOR_MAX_OUTPUT_TOKENS,
+    "response_mime_type": "application/json",
+}
+
+# Whole-response calls are held to the TailorOutput schema
+GENERATION_CONFIG = {
+    **STREAM_GENERATION_CONFIG,
+    "response_schema": response_schema(TailorOutput),
+}
+
+
+def _parse_result(text: str) -> Tuple[Dict[str, Any], bool, Optional[ResumeData]]:
+
+    # Fast path: one validating pass over the raw text builds the resume
+    # tree that is rendered, with no intermediate dict or copies.
+    try:
+        output = TailorOutput.model_validate_json(text)
+    except ValidationError:
+        return _recover_result(text)
+
+    return output.model_dump(exclude={"resume_data"}), True, output.resume_data
+
+
+def _recover_result(text: str) -> Tuple[Dict[str, Any], bool, Optional[ResumeData]]:
+
+    # A response cut off at max_output_tokens still carries every field
+    # that closed before the cut, so keep those instead of failing.
+    result, complete = parse_json_document(text)
+
+    if not complete:
+        print(f"Truncated AI response, recovered fields: {list(result)}")
+
+    if not isinstance(result.get("tailored_resume"), str):
+        print(f"Response preview: {text[:500]}...")
+        raise ValueError("Failed to parse AI response as JSON: no tailored resume in response")
+
+    for field in SUMMARY_FIELDS:
+        result.setdefault(field, [])
+
+    result["tailored_resume_latex"] = ""
+    resume_data = result.pop("resume_data", None)
+
+    if resume_data is None:
+        return result, complete, None
+
+    try:
+        return result, complete, ResumeData.model_validate(resume_data)
+    except ValidationError as e:
+        fields = ", ".join(".".join(str(part) for part in error["loc"]) for error in e.errors())
+        print(f"resume_data failed validation: {e}")
+        result["tailored_resume_latex"] = f"Error generating LaTeX: invalid resume_data fields: {fields}"
+        return result, complete, None
+
+
+def _cache_entry(result: Dict[str, Any], resume_data: Optional[ResumeData]) -> Dict[str, Any]:
+
+    # The cache keeps resume_data rather than LaTeX, so a hit can be
+    # rendered with whichever template the caller asks for
+    if resume_data is None:
+        return result
+    return {**result, "resume_data": resume_data.model_dump()}
+
+
+async def _with_latex(
+    result: Dict[str, Any],
+    template: Optional[CustomTemplate],
+    resume_data: Optional[ResumeData] = None
+) -> Dict[str, Any]:
+
+    result = dict(result)
+    cached_data = result.pop("resume_data", None)
+
+    # Only cache hits are validated again; a fresh result comes with the
+    # tree it was parsed into. Entries from before resume_data was cached
+    # carry their LaTeX already.
+    if resume_data is None and cached_data is not None:
+        resume_data = ResumeData.model_validate(cached_data)
+
+    if resume_data is None:
+        return result
+
+    try:
+        if template is None:
+            result["tailored_resume_latex"] = render_latex(resume_data)
+        else:
+            result["tailored_resume_latex"] = await render_off_loop(render_latex, resume_data, template)
+    except Exception as e:
+        # A user template can fail at render time (undefined attribute,
+        # sandbox limit); the rest of the result is still good
+        result["tailored_resume_latex"] = f"Error generating LaTeX: {str(e)}"
+
+    return result
+
+
+# Tailoring calls in flight, by cache key. Identical requests that arrive
+# while one is running (retries, double clicks) await it instead of making
+# their own Gemini call.
+_in_flight: Dict[str, "asyncio.Task[Tuple[Dict[str, Any], Optional[ResumeData]]]"] = {}
+coalesced_calls = 0
 
 
 async def tailor_resume(
     job_description: str,
-    master_resume: str
+    master_resume: str,
+    use_cache: bool = True,
+    template: Optional[CustomTemplate] = None
 ) -> Dict[str, Any]:
 
+    global coalesced_calls
+
+    # Scraped boilerplate is dropped before it reaches the cache key, so
+    # postings that only differ in page chrome share a result
+    job_description = compact_job_description(job_description).text
+    cache_key = make_cache_key(job_description, master_resume, PROMPT_VERSION, MODEL_NAME)
+
+    if use_cache:
+        cached = await tailor_cache.get(cache_key)
+        if cached is not None:
+            return await _with_latex(cached, template)
+
+    task = _in_flight.get(cache_key)
+
+    if task is None:
+        task = asyncio.create_task(_generate_tailored_resume(cache_key, job_description, master_resume))
+        _in_flight[cache_key] = task
+        task.add_done_callback(lambda done: _finish_in_flight(cache_key, done))
+    else:
+        coalesced_calls += 1
+
+    # Shielded so a caller that disconnects doesn't cancel the call the
+    # others are waiting on. If everyone leaves, it still finishes and
+    # lands in the cache for the retry.
+    result, resume_data = await asyncio.shield(task)
+    return await _with_latex(result, template, resume_data)
+
+
+def in_flight_stats() -> Dict[str, int]:
+    return {"running": len(_in_flight), "coalesced": coalesced_calls}
+
+
+def _finish_in_flight(cache_key: str, task: asyncio.Task) -> None:
+    _in_flight.pop(cache_key, None)
+
+    # Mark the error as seen when every caller has gone away
+    if not task.cancelled():
+        task.exception()
+
+
+async def _generate_tailored_resume(
+    cache_key: str,
+    job_description: str,
+    master_resume: str
+) -> Tuple[Dict[str, Any], Optional[ResumeData]]:
+
     prompt = get_prompt(job_description, master_resume)
 
     try:
-        model = genai.GenerativeModel('models/gemini-2.5-flash-lite')
+        model = await get_model(MODEL_NAME, GENERATION_CONFIG, SYSTEM_INSTRUCTION)
 
         # Generate content with JSON response
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "top_k": 40,
-                "max_output_tokens": 8192,
-                "response_mime_type": "application/json",
-            }
-        )
-
-        # Parse JSON response
-        result = json.loads(response.text)
-
-        # Generate LaTeX from structured data
-        if 'resume_data' in result:
-            try:
-                resume_data = parse_resume_data(result['resume_data'])
-                result['tailored_resume_latex'] = render_latex(resume_data)
-            except Exception as e:
-                print(f"LaTeX rendering error: {e}")
-                result['tailored_resume_latex'] = f"Error generating LaTeX: {str(e)}"
+        response = await generate_content(model, prompt)
 
-        return result
-
-    except json.JSONDecodeError as e:
-        # Log the error for debugging
-        print(f"JSON Parse Error: {str(e)}")
-        print(f"Response preview: {response.text[:500]}...")
-        raise ValueError(f"Failed to parse AI response as JSON: {str(e)}")
+    except GeminiRateLimited:
+        raise
 
     except Exception as e:
         # Handle other errors
         raise Exception(f"Error calling Gemini API: {str(e)}")
+
+    # Parse JSON response
+    result, complete, resume_data = _parse_result(response.text)
+
+    # Partial results are returned but never cached
+    if complete:
+        await tailor_cache.set(cache_key, _cache_entry(result, resume_data))
+
+    return result, resume_data
+
+
+async def tailor_resume_stream(
+    job_description: str,
+    master_resume: str,
+    use_cache: bool = True,
+    template: Optional[CustomTemplate] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+
+    # Yields (event, data) pairs: "tailored_resume" text deltas while the
+    # model is generating, then the summary fields, then the LaTeX render.
+    job_description = compact_job_description(job_description).text
+    cache_key = make_cache_key(job_description, master_resume, PROMPT_VERSION, MODEL_NAME)
+
+    if use_cache:
+        cached = await tailor_cache.get(cache_key)
+        if cached is not None:
+            yield "tailored_resume", {"delta": cached.get("tailored_resume", "")}
+            for field in SUMMARY_FIELDS:
+                yield field, cached.get(field, [])
+            latex = (await _with_latex(cached, template)).get("tailored_resume_latex", "")
+            yield "tailored_resume_latex", latex
+            return
+
+    prompt = get_prompt(job_description, master_resume)
+    parser = StreamingJSONParser(stream_fields=("tailored_resume",))
+    sent = set()
+
+    try:
+        model = await get_model(MODEL_NAME, STREAM_GENERATION_CONFIG, SYSTEM_INSTRUCTION)
+
+        async for chunk in stream_content(model, prompt):
+            for kind, path, value in parser.feed(chunk):
+                if kind == "delta":
+                    yield "tailored_resume", {"delta": value}
+                elif len(path) == 1 and path[0] in SUMMARY_FIELDS:
+                    sent.add(path[0])
+                    yield path[0], value
+
+    except GeminiRateLimited:
+        raise
+
+    except Exception as e:
+        raise Exception(f"Error calling Gemini API: {str(e)}")
+
+    result, complete, resume_data = _parse_result(parser.text)
+
+    # Fields the model never produced are still sent, empty
+    for field in SUMMARY_FIELDS:
+        if field not in sent:
+            yield field, result[field]
+
+    yield "tailored_resume_latex", (await _with_latex(result, template, resume_data))["tailored_resume_latex"]
+
+    if complete:
+        await tailor_cache.set(cache_key, _cache_entry(result, resume_data))
+
+
+async def tailor_resume_batch(
+    job_descriptions: List[str],
+    master_resume: str,
+    use_cache: bool = True,
+    template: Optional[CustomTemplate] = None
+) -> AsyncIterator[Tuple[List[int], Union[Dict[str, Any], Exception]]]:
+
+    # Yields (indexes, result) as each distinct posting finishes. Postings
+    # that only differ in whitespace are tailored once and share a result;
+    # a failed posting yields its exception instead of ending the batch.
+    positions: Dict[str, List[int]] = {}
+    for index, job_description in enumerate(job_descriptions):
+        positions.setdefault(normalize_job_description(job_description), []).append(index)
+
+    # Keeps one batch from taking every generation slot of the worker
+    slots = asyncio.Semaphore(settings.TAILOR_BATCH_CONCURRENCY)
+
+    async def run(indexes: List[int]):
+        async with slots:
+            try:
+                result = await tailor_resume(
+                    job_description=job_descriptions[indexes[0]],
+                    master_resume=master_resume,
+                    use_cache=use_cache,
+                    template=template
+                )
+            except Exception as e:
+                return indexes, e
+
+        return indexes, result
+
+    tasks = [asyncio.create_task(run(indexes)) for indexes in positions.values()]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client went away: stop the postings still waiting
+        for task in tasks:
+            task.cancel()
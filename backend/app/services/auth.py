@@ -6,6 +6,7 @@ import requests
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.models.user import User
+from app.services import auth_cache
 
 # JWT Configuration
 ALGORITHM = "HS256"
@@ -88,6 +89,7 @@ def get_or_create_user(db: Session, google_info: dict) -> User:
         user.email = google_info.get("email", user.email)
         user.name = google_info.get("name", user.name)
         db.commit()
+        auth_cache.invalidate_user(user.id)
         return user
 
     # Create new user
@@ -0,0 +1,54 @@
+import threading
+import time
+from typing import FrozenSet, Optional
+from app.config import settings
+from app.models.user import User
+from app.services.ttl_cache import TTLCache
+
+
+# token -> User row, detached from its session. The key is the full token,
+# so the entry is tied to the signature that was verified when it was stored.
+_users = TTLCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
+# user_id -> tokens cached for that user, so updates can evict them. Also a
+# TTLCache, so users who stop calling drop out of it instead of piling up.
+_tokens_by_user = TTLCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
+_lock = threading.Lock()
+
+
+def get_user(token: str) -> Optional[User]:
+    return _users.get(token)
+
+
+def put_user(token: str, payload: dict, user: User) -> None:
+
+    # Never keep an entry past the token's own expiry
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+
+    _users.set(token, user, ttl_seconds=ttl)
+
+    with _lock:
+        # Tokens that expired or were evicted from _users are dropped here
+        tokens: FrozenSet[str] = _tokens_by_user.get(user.id) or frozenset()
+        live = frozenset(cached for cached in tokens if _users.get(cached) is not None)
+        _tokens_by_user.set(user.id, live | {token})
+
+
+def invalidate_user(user_id: int) -> None:
+
+    # Only clears this worker's cache; other workers catch up within the TTL
+    with _lock:
+        tokens = _tokens_by_user.get(user_id) or frozenset()
+        _tokens_by_user.delete(user_id)
+
+    for token in tokens:
+        _users.delete(token)
@@ -1,14 +1,5 @@
-def get_cover_letter_prompt(job_description: str, master_resume: str, company_name: str = "", job_title: str = "") -> str:
-    return f"""You are an expert cover letter writer. Your task is to write a compelling, personalized cover letter for a specific job posting based on the candidate's resume.
-
-JOB DESCRIPTION:
-{job_description}
-
-CANDIDATE'S RESUME:
-{master_resume}
-
-COMPANY NAME: {company_name if company_name else "the company"}
-JOB TITLE: {job_title if job_title else "the position"}
+# Static part of the cover letter prompt, sent as the system instruction
+COVER_LETTER_SYSTEM_INSTRUCTION = """You are an expert cover letter writer. Your task is to write a compelling, personalized cover letter for a specific job posting based on the candidate's resume.
 
 COVER LETTER GUIDELINES:
 
@@ -38,9 +29,27 @@ COVER LETTER GUIDELINES:
    - Every claim must be traceable to the resume
 
 Return your response as a JSON object with this EXACT structure:
-{{
-  "cover_letter": "The complete cover letter in plain text format",
-  "cover_letter_latex": "The cover letter formatted in LaTeX (using a professional letter template)",
+{
+  "candidate": {
+    "name": "Candidate's full name from the resume",
+    "email": "Email from the resume, or null",
+    "phone": "Phone number from the resume, or null",
+    "linkedin": "LinkedIn URL from the resume, or null",
+    "github": "GitHub URL from the resume, or null",
+    "location": "City from the resume, or null"
+  },
+  "recipient": {
+    "name": "Hiring manager's name if the posting gives one, otherwise null",
+    "title": "Their title if given, otherwise null",
+    "company": "Company name",
+    "address": null
+  },
+  "job_title": "Job title",
+  "body_paragraphs": [
+    "Opening paragraph",
+    "Body paragraph",
+    "Closing paragraph"
+  ],
   "key_points_highlighted": [
     "Experience or skill #1 you emphasized",
     "Experience or skill #2 you emphasized",
@@ -49,53 +58,25 @@ Return your response as a JSON object with this EXACT structure:
   "customization_notes": [
     "How you customized this letter for this specific role"
   ]
-}}
-
-LATEX FORMAT REQUIREMENTS:
-- Use the letter document class
-- Include proper formatting with date, recipient address placeholder, salutation
-- Use professional spacing and margins
-- The LaTeX should compile without errors
-
-EXAMPLE LATEX STRUCTURE:
-\\documentclass[11pt]{{letter}}
-\\usepackage[margin=1in]{{geometry}}
-\\usepackage{{hyperref}}
-\\usepackage{{ragged2e}}
-
-\\AtBeginDocument{{\\RaggedRight}}
-\\setlength{{\\parindent}}{{0pt}}
-
-\\signature{{[Candidate Name]}}
-\\date{{}}
-\\begin{{document}}
-
-\\begin{{letter}}{{Hiring Manager \\\\ [Company Name]}}
+}
 
-% --- Contact info (left aligned) ---
-{{\\large \\textbf{{[Candidate Name]}}}}\\\\[4pt]
-[email@example.com] \\\\[4pt]
-[(123) 456-7890] \\\\[4pt]
-[Date]
-
-\\vspace{{12pt}}
-
-\\opening{{Dear Hiring Manager,}}
-
-[Body paragraphs here]
+OUTPUT REQUIREMENTS:
+- "body_paragraphs": The 3-4 paragraphs of the letter as plain text, without the salutation, sign-off or signature
+- "candidate" and "recipient": Copied from the resume and job posting, never invented
+- "key_points_highlighted": 2-4 specific experiences/skills you emphasized
+- "customization_notes": 1-2 notes on how you personalized for this role
+- Do not format the letter in LaTeX or Markdown; it is laid out for you
+"""
 
-\\vspace{{12pt}}
 
-Sincerely, \\\\
-[Candidate Name]
+def get_cover_letter_prompt(job_description: str, master_resume: str, company_name: str = "", job_title: str = "") -> str:
+    return f"""JOB DESCRIPTION:
+{job_description}
 
-\\end{{letter}}
+CANDIDATE'S RESUME:
+{master_resume}
 
-\\end{{document}}
+COMPANY NAME: {company_name if company_name else "the company"}
+JOB TITLE: {job_title if job_title else "the position"}
+"""
 
-OUTPUT REQUIREMENTS:
-- "cover_letter": Plain text version, well-formatted with proper paragraphs
-- "cover_letter_latex": Complete LaTeX document that compiles correctly
-- "key_points_highlighted": 2-4 specific experiences/skills you emphasized
-- "customization_notes": 1-2 notes on how you personalized for this role
-"""
\ No newline at end of file
@@ -1,7 +1,7 @@
 from typing import List, Optional
 from pydantic import BaseModel
-from jinja2 import Environment, BaseLoader
 from .cover_letter_templates import DEFAULT_COVER_LETTER_TEMPLATE
+from .template_registry import CustomTemplate, content_hash, get_template, render_custom
 
 
 class CandidateInfo(BaseModel):
@@ -28,92 +28,40 @@ class CoverLetterData(BaseModel):
     body_paragraphs: List[str]
 
 
+TEMPLATE_ID = "default:cover_letter"
 LATEX_TEMPLATE = DEFAULT_COVER_LETTER_TEMPLATE
+TEMPLATE_VERSION = content_hash(LATEX_TEMPLATE)
 
 
-def escape_latex(text: str) -> str:
+def render_cover_letter_latex(data: CoverLetterData, custom: Optional[CustomTemplate] = None) -> str:
 
-    if not text:
-        return text
-
-    replacements = [
-        ('\\', r'\textbackslash{}'),
-        ('&', r'\&'),
-        ('%', r'\%'),
-        ('$', r'\$'),
-        ('#', r'\#'),
-        ('_', r'\_'),
-        ('{', r'\{'),
-        ('}', r'\}'),
-        ('~', r'\textasciitilde{}'),
-        ('^', r'\textasciicircum{}'),
-    ]
-
-    for old, new in replacements:
-        text = text.replace(old, new)
-
-    return text
-
-
-def render_cover_letter_latex(data: CoverLetterData) -> str:
-
-    env = Environment(
-        loader=BaseLoader(),
-        variable_start_string='<<',
-        variable_end_string='>>',
-        block_start_string='<%',
-        block_end_string='%>',
-        comment_start_string='<#',
-        comment_end_string='#>',
-        autoescape=False,
-    )
-
-    env.filters['escape_latex'] = escape_latex
-
-    template = env.from_string(LATEX_TEMPLATE)
-
-    # Escape all text content before rendering
-    escaped_data = escape_cover_letter_data(data)
-
-    return template.render(
-        candidate=escaped_data.candidate,
-        recipient=escaped_data.recipient,
-        date=escaped_data.date,
-        job_title=escaped_data.job_title,
-        body_paragraphs=escaped_data.body_paragraphs,
+    context = dict(
+        candidate=data.candidate,
+        recipient=data.recipient,
+        date=data.date,
+        job_title=data.job_title,
+        body_paragraphs=data.body_paragraphs,
     )
 
+    # Text is LaTeX-escaped by the template environment as it renders
+    if custom is None:
+        return get_template(TEMPLATE_ID, LATEX_TEMPLATE, TEMPLATE_VERSION).render(**context)
+    return render_custom(custom, **context)
 
-def escape_cover_letter_data(data: CoverLetterData) -> CoverLetterData:
-
-    # Escape candidate info (but not URLs/email)
-    escaped_candidate = CandidateInfo(
-        name=escape_latex(data.candidate.name),
-        email=data.candidate.email,  
-        phone=escape_latex(data.candidate.phone) if data.candidate.phone else None,
-        linkedin=data.candidate.linkedin,  
-        github=data.candidate.github,  
-        location=escape_latex(data.candidate.location) if data.candidate.location else None,
-    )
 
-    # Escape recipient info
-    escaped_recipient = RecipientInfo(
-        name=escape_latex(data.recipient.name) if data.recipient.name else None,
-        title=escape_latex(data.recipient.title) if data.recipient.title else None,
-        company=escape_latex(data.recipient.company),
-        address=escape_latex(data.recipient.address) if data.recipient.address else None,
-    )
+def render_cover_letter_text(data: CoverLetterData) -> str:
 
-    # Escape body paragraphs
-    escaped_paragraphs = [escape_latex(p) for p in data.body_paragraphs]
+    # Same layout as the LaTeX template, for pasting into application forms
+    header = [data.candidate.name]
+    header += [value for value in (data.candidate.email, data.candidate.phone) if value]
+    header.append(data.date)
 
-    return CoverLetterData(
-        candidate=escaped_candidate,
-        recipient=escaped_recipient,
-        date=escape_latex(data.date),
-        job_title=escape_latex(data.job_title) if data.job_title else None,
-        body_paragraphs=escaped_paragraphs,
-    )
+    return "\n\n".join([
+        "\n".join(header),
+        f"Dear {data.recipient.name},",
+        *data.body_paragraphs,
+        f"Sincerely,\n{data.candidate.name}",
+    ])
 
 
 def parse_cover_letter_data(data: dict) -> CoverLetterData:
@@ -1,46 +1,122 @@
-import json
-import google.generativeai as genai
-from typing import Dict, Any
+from datetime import date
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, ValidationError
 from app.config import settings
-from .cover_letter_prompt import get_cover_letter_prompt
+from app.services.ai_client import GeminiRateLimited, generate_content, get_model, response_schema
+from app.services.cover_letter_renderer import (
+    CandidateInfo,
+    CoverLetterData,
+    RecipientInfo,
+    render_cover_letter_latex,
+    render_cover_letter_text,
+)
+from app.services.job_description import compact_job_description
+from app.services.json_stream import parse_json_document
+from app.services.template_registry import CustomTemplate, render_off_loop
+from .cover_letter_prompt import get_cover_letter_prompt, COVER_LETTER_SYSTEM_INSTRUCTION
 
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
+class CoverLetterOutput(BaseModel):
+    """
+    The JSON object the model is asked to return: the letter's content
+    only. Plain text and LaTeX are both laid out locally from it.
+    """
+
+    candidate: CandidateInfo
+    recipient: RecipientInfo
+    job_title: Optional[str] = None
+    body_paragraphs: List[str]
+    key_points_highlighted: List[str]
+    customization_notes: List[str]
+
+
+GENERATION_CONFIG = {
+    "temperature": settings.GEMINI_TEMPERATURE,
+    "top_p": settings.GEMINI_TOP_P,
+    "top_k": settings.GEMINI_TOP_K,
+    "max_output_tokens": settings.COVER_LETTER_MAX_OUTPUT_TOKENS,
+    "response_mime_type": "application/json",
+    "response_schema": response_schema(CoverLetterOutput),
+}
+
+
+def _parse_output(text: str) -> CoverLetterOutput:
+
+    try:
+        return CoverLetterOutput.model_validate_json(text)
+    except ValidationError:
+        pass
+
+    # Keep every completed field if the response was cut off
+    result, complete = parse_json_document(text)
+
+    if not complete:
+        print(f"Truncated AI response, recovered fields: {list(result)}")
+
+    result.setdefault("key_points_highlighted", [])
+    result.setdefault("customization_notes", [])
+
+    try:
+        return CoverLetterOutput.model_validate(result)
+    except ValidationError as e:
+        fields = ", ".join(".".join(str(part) for part in error["loc"]) for error in e.errors())
+        raise ValueError(f"Failed to parse AI response as JSON: invalid cover letter fields: {fields}")
 
 
 async def generate_cover_letter(
     job_description: str,
     master_resume: str,
     company_name: str = "",
-    job_title: str = ""
+    job_title: str = "",
+    template: Optional[CustomTemplate] = None
 ) -> Dict[str, Any]:
 
     prompt = get_cover_letter_prompt(
-        job_description=job_description,
+        job_description=compact_job_description(job_description).text,
         master_resume=master_resume,
         company_name=company_name,
         job_title=job_title
     )
 
     try:
-        model = genai.GenerativeModel('models/gemini-2.5-flash-lite')
-
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "top_k": 40,
-                "max_output_tokens": 4096,
-                "response_mime_type": "application/json",
-            }
-        )
+        model = await get_model(settings.GEMINI_MODEL, GENERATION_CONFIG, COVER_LETTER_SYSTEM_INSTRUCTION)
 
-        result = json.loads(response.text)
-        return result
+        response = await generate_content(model, prompt)
 
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Failed to parse AI response as JSON: {str(e)}")
+    except GeminiRateLimited:
+        raise
 
     except Exception as e:
         raise Exception(f"Error calling Gemini API: {str(e)}")
+
+    output = _parse_output(response.text)
+
+    if not output.recipient.name:
+        output.recipient.name = "Hiring Manager"
+
+    # The model doesn't know today's date
+    today = date.today()
+
+    letter = CoverLetterData(
+        candidate=output.candidate,
+        recipient=output.recipient,
+        date=f"{today:%B} {today.day}, {today.year}",
+        job_title=output.job_title or job_title or None,
+        body_paragraphs=output.body_paragraphs,
+    )
+
+    try:
+        if template is None:
+            latex = render_cover_letter_latex(letter)
+        else:
+            latex = await render_off_loop(render_cover_letter_latex, letter, template)
+    except Exception as e:
+        # A user template can fail at render time; the plain text is still good
+        latex = f"Error generating LaTeX: {str(e)}"
+
+    return {
+        "cover_letter": render_cover_letter_text(letter),
+        "cover_letter_latex": latex,
+        "key_points_highlighted": output.key_points_highlighted,
+        "customization_notes": output.customization_notes,
+    }
@@ -16,7 +16,7 @@ DEFAULT_COVER_LETTER_TEMPLATE = r"""
 
 % --- Manually place contact info (left aligned) ---
 {\large \textbf{<< candidate.name >>}}\\[4pt]
-<% if candidate.email %><< candidate.email >> \\[4pt]<% endif %>
+<% if candidate.email %><< candidate.email | safe >> \\[4pt]<% endif %>
 <% if candidate.phone %><< candidate.phone >> \\[4pt]<% endif %>
 << date >>
 
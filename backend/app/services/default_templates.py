@@ -62,7 +62,7 @@ DEFAULT_RESUME_TEMPLATE = r"""
 
 \begin{center}
     \textbf{\Huge \scshape << contact.name >>} \\ \vspace{1pt}
-    \small<% if contact.phone %><< contact.phone >><% endif %><% if contact.email %> $|$ \href{mailto:<< contact.email >>}{\underline{<< contact.email >>}}<% endif %><% if contact.linkedin %> $|$ \href{https://<< contact.linkedin >>}{\underline{<< contact.linkedin >>}}<% endif %><% if contact.github %> $|$ \href{https://<< contact.github >>}{\underline{<< contact.github >>}}<% endif %>
+    \small<% if contact.phone %><< contact.phone >><% endif %><% if contact.email %> $|$ \href{mailto:<< contact.email | safe >>}{\underline{<< contact.email | safe >>}}<% endif %><% if contact.linkedin %> $|$ \href{https://<< contact.linkedin | safe >>}{\underline{<< contact.linkedin | safe >>}}<% endif %><% if contact.github %> $|$ \href{https://<< contact.github | safe >>}{\underline{<< contact.github | safe >>}}<% endif %>
 \end{center}
 
 %-----------EDUCATION-----------
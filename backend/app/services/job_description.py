@@ -0,0 +1,259 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.ai_client import estimate_tokens
+
+
+# Whole lines of page chrome that scrapers pick up around the posting
+_NAV_LINE = re.compile(
+    r"(sign in|log in|sign up|sign out|log out|join|join now|jobs|apply|apply now|easy apply|"
+    r"save|save job|share|share this job|"
+    r"report this job|back to (jobs|search( results)?)|see more|show more|show less|"
+    r"similar jobs|people also viewed|skip to (main )?content|menu|home|careers|"
+    r"accept( all)?( cookies)?|reject( all)?( cookies)?|manage (cookies|preferences)|"
+    r"cookie settings|privacy policy|terms of (use|service))\.?",
+    re.IGNORECASE,
+)
+
+# Legal and cookie text that never says anything about the role
+_BOILERPLATE = re.compile(
+    r"equal (employment )?opportunity|without regard to (race|age|sex|gender|religion|color)|"
+    r"protected veteran|reasonable accommodations?|e-verify|pay transparency|"
+    r"we use cookies|this (site|website) uses cookies|cookie policy|all rights reserved|"
+    r"©|fraudulent (job )?(offers|recruit)",
+    re.IGNORECASE,
+)
+
+# Section headings, by how much they matter to the model: 0 is kept first
+# when the posting is over budget, 2 is the first to go
+_HEADING_PRIORITIES = (
+    (0, re.compile(
+        r"requirement|qualification|responsibilit|what you('|’)?ll do|what you will do|"
+        r"looking for|skills|must have|nice to have|preferred|you have|you will|"
+        r"your role|the role|duties|tech stack|experience",
+        re.IGNORECASE,
+    )),
+    (2, re.compile(
+        r"benefit|perk|about us|about the company|who we are|our culture|why join|"
+        r"life at|compensation|salary|what we offer|equal opportunity",
+        re.IGNORECASE,
+    )),
+)
+
+# Repeated segments at least this long are dropped as scraped duplicates.
+# Shorter ones ("Python", "Remote") may rightly appear in several sections.
+_MIN_DUPLICATE_CHARS = 80
+
+# Whole lines taken as section headings when they don't end in ":"
+_HEADING = re.compile(
+    r"(?:(?:key|core|main|minimum|basic|required|preferred|desired|additional|bonus|"
+    r"technical|job|role|your|the|our)\s+)*"
+    r"(?:requirements?|qualifications?|responsibilities|duties|skills|experience|tech stack|"
+    r"benefits|perks|compensation|salary|nice to haves?|must haves?|the role|your role|"
+    r"about (?:us|the (?:company|role|team|job))|who we are|who you are|our culture|"
+    r"what (?:you(?:'|’)?ll|you will) do|what (?:we(?:'|’)?re|we are) looking for|"
+    r"what (?:we offer|you(?:'|’)?ll bring|you will bring|you bring)|why join us|"
+    r"equal (?:employment )?opportunity)",
+    re.IGNORECASE,
+)
+
+_WHITESPACE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+
+# The extension sends the posting as a single line, so lines are split
+# further: at inline headings ("Requirements: ..."), bullets and sentence ends
+_INLINE_HEADING = re.compile(r"(?:^|(?<=\s))([A-Z][\w'’&/-]*(?: [\w'’&/-]+){0,4}:)(?: |$)")
+_SEGMENT_BREAK = re.compile(r"\n|(?<=[.!?])\s+(?=[A-Z0-9\"“(])|\s+(?=[•·▪] )")
+
+
+@dataclass(frozen=True, slots=True)
+class CompactedJobDescription:
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+_totals = {"requests": 0, "tokens_before": 0, "tokens_after": 0}
+
+
+def _is_heading(line: str) -> bool:
+
+    if len(line) > 60 or line[0] in "-•*·":
+        return False
+    if line.endswith(":"):
+        return True
+
+    # "Requirements", "What you'll do" - the whole line has to be a heading
+    # phrase, since a bullet without its marker ("Strong Python skills")
+    # reads much the same
+    return _HEADING.fullmatch(line) is not None
+
+
+def _priority(heading: str) -> int:
+    for priority, pattern in _HEADING_PRIORITIES:
+        if pattern.search(heading):
+            return priority
+    return 1
+
+
+def _clean_lines(text: str) -> List[str]:
+
+    lines = []
+    seen = set()
+
+    for raw in text.splitlines():
+        line = _WHITESPACE.sub(" ", raw).strip()
+
+        if not line:
+            # Keep single blank lines as paragraph breaks
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+
+        line = _INLINE_HEADING.sub(lambda match: f"\n{match.group(1)}\n", line)
+
+        for segment in _SEGMENT_BREAK.split(line):
+            segment = segment.strip()
+
+            # Only the offending sentence goes, never the rest of its line
+            if not segment or _NAV_LINE.fullmatch(segment) or _BOILERPLATE.search(segment):
+                continue
+
+            # Scraped pages often repeat the same paragraph (sticky headers,
+            # "read more" expansions); the first copy is enough
+            if len(segment) >= _MIN_DUPLICATE_CHARS:
+                key = segment.casefold()
+                if key in seen:
+                    continue
+                seen.add(key)
+
+            lines.append(segment)
+
+    while lines and not lines[-1]:
+        lines.pop()
+
+    return lines
+
+
+def _sections(lines: List[str]) -> List[Tuple[int, List[str]]]:
+
+    # Text before the first heading (title, summary) ranks with priority 1.
+    # Every section after it starts with a heading and has lines under it.
+    sections: List[Tuple[int, List[str]]] = [(1, [])]
+
+    # Whether the next non-blank line after each line is a heading; None
+    # after the last one
+    next_is_heading: List[Optional[bool]] = [None] * len(lines)
+    upcoming = None
+    for index in range(len(lines) - 1, -1, -1):
+        next_is_heading[index] = upcoming
+        if lines[index]:
+            upcoming = _is_heading(lines[index])
+
+    for index, line in enumerate(lines):
+        # A heading with nothing under it before the next heading is kept
+        # as text, so _fit_budget never mistakes it for an empty section
+        if line and _is_heading(line) and next_is_heading[index] is False:
+            sections.append((_priority(line), [line]))
+        else:
+            sections[-1][1].append(line)
+
+    # The first section stays, possibly empty, so every later one starts
+    # with its heading
+    return sections
+
+
+def _truncate(text: str, tokens: int) -> str:
+
+    # Cut at a word boundary within roughly the given number of tokens
+    limit = (tokens - 1) * 4
+    if limit <= 0:
+        return ""
+    if len(text) <= limit:
+        return text
+
+    cut = text.rfind(" ", 0, limit + 1)
+    return text[:cut if cut > 0 else limit].rstrip()
+
+
+def _fit_budget(sections: List[Tuple[int, List[str]]], budget: int) -> List[str]:
+
+    # Fill the budget with the most important sections first, then put the
+    # kept lines back in their original order
+    kept: List[List[str]] = [[] for _ in sections]
+    remaining = budget
+
+    for priority in (0, 1, 2):
+        for index, (section_priority, lines) in enumerate(sections):
+            if section_priority != priority or remaining <= 0:
+                continue
+
+            for line in lines:
+                cost = estimate_tokens(line)
+
+                if cost > remaining:
+                    # A wall of text with no sentence breaks is cut short
+                    # rather than dropped
+                    line = _truncate(line, remaining)
+                    if line:
+                        kept[index].append(line)
+                    remaining = 0
+                    break
+
+                remaining -= cost
+                kept[index].append(line)
+
+    result: List[str] = []
+    for index, section_lines in enumerate(kept):
+        # A heading whose lines were all cut is just noise
+        if index > 0 and not any(section_lines[1:]):
+            continue
+        result.extend(section_lines)
+
+    return result
+
+
+def compact_job_description(job_description: str) -> CompactedJobDescription:
+
+    tokens_before = estimate_tokens(job_description)
+
+    lines = _clean_lines(job_description)
+    text = "\n".join(lines)
+
+    budget = settings.JOB_DESCRIPTION_TOKEN_BUDGET
+    if budget and estimate_tokens(text) > budget:
+        text = "\n".join(_fit_budget(_sections(lines), budget))
+
+    # Nothing survived the cleanup: the filters misjudged this posting, so
+    # send it as it came rather than an empty one
+    if not text.strip():
+        text = " ".join(job_description.split())
+        if budget:
+            text = _truncate(text, budget)
+
+    compacted = CompactedJobDescription(
+        text=text,
+        tokens_before=tokens_before,
+        tokens_after=estimate_tokens(text),
+    )
+
+    _totals["requests"] += 1
+    _totals["tokens_before"] += compacted.tokens_before
+    _totals["tokens_after"] += compacted.tokens_after
+
+    if compacted.tokens_saved:
+        print(f"Job description compacted: {compacted.tokens_before} -> {compacted.tokens_after} tokens")
+
+    return compacted
+
+
+def stats() -> Dict[str, int]:
+
+    return {
+        **_totals,
+        "tokens_saved": _totals["tokens_before"] - _totals["tokens_after"],
+    }
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.generation_job import GenerationJob
+from app.services import ai_service, cover_letter_service
+from app.services.template_registry import CustomTemplate
+
+
+# Job kind -> service call. The job payload holds its keyword arguments.
+HANDLERS = {
+    "tailor": ai_service.tailor_resume,
+    "cover_letter": cover_letter_service.generate_cover_letter,
+}
+
+FINISHED = ("succeeded", "failed")
+
+
+class MemoryQueueBackend:
+    """Jobs run in the worker process that accepted them."""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+
+        # Jobs accepted before a restart are still in the table
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(GenerationJob.id)
+                .where(GenerationJob.status == "queued")
+                .order_by(GenerationJob.created_at)
+            )
+            for job_id in result.scalars():
+                self._queue.put_nowait(job_id)
+
+    def notify(self, job_id: str) -> None:
+        self._queue.put_nowait(job_id)
+
+    async def next_job(self) -> str:
+        return await self._queue.get()
+
+
+class DatabaseQueueBackend:
+    """
+    Any worker process can run any job. Workers find queued jobs by polling
+    the table; jobs submitted to this process wake its workers right away.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+
+    def notify(self, job_id: str) -> None:
+        self._wakeup.set()
+
+    async def next_job(self) -> str:
+        while True:
+            self._wakeup.clear()
+
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(GenerationJob.id)
+                    .where(GenerationJob.status == "queued")
+                    .order_by(GenerationJob.created_at)
+                    .limit(1)
+                )
+                job_id = result.scalar()
+
+            if job_id is not None:
+                return job_id
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+class JobQueue:
+    """Persists generation jobs and runs them on a pool of worker tasks."""
+
+    def __init__(self, backend, workers: int, poll_interval: float, stale_after: float):
+        self.backend = backend
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._tasks: List[asyncio.Task] = []
+
+        # Callers of wait() for each job, woken when this process finishes it
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+
+    async def start(self) -> None:
+        await self.backend.start()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reclaimer()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        kind: str,
+        payload: Dict[str, Any]
+    ) -> GenerationJob:
+
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job = GenerationJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            kind=kind,
+            status="queued",
+            payload=json.dumps(payload),
+        )
+        db.add(job)
+        await db.commit()
+
+        self.backend.notify(job.id)
+
+        return job
+
+    async def get(self, db: AsyncSession, job_id: str) -> Optional[GenerationJob]:
+        result = await db.execute(
+            select(GenerationJob)
+            .where(GenerationJob.id == job_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[GenerationJob]:
+
+        # Returns the job once it has finished, or as it is when the timeout
+        # runs out. Jobs finished by another process are seen by polling.
+        # Each poll takes a pooled connection only for its one query, so
+        # long waits don't hold connections other requests need.
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        event = asyncio.Event()
+        self._waiters.setdefault(job_id, set()).add(event)
+
+        try:
+            while True:
+                async with AsyncSessionLocal() as db:
+                    job = await self.get(db, job_id)
+                remaining = deadline - loop.time()
+
+                if job is None or job.status in FINISHED or remaining <= 0:
+                    return job
+
+                try:
+                    await asyncio.wait_for(event.wait(), min(self.poll_interval, remaining))
+                except asyncio.TimeoutError:
+                    pass
+
+        finally:
+            waiters = self._waiters.get(job_id)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self._waiters[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self.backend.next_job()
+
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Database trouble shouldn't take the worker down with it.
+                # The memory backend has already handed this id out, so it
+                # is offered again later rather than lost until a restart.
+                print(f"Job worker error on {job_id}: {e}")
+                asyncio.get_running_loop().call_later(self.poll_interval, self.backend.notify, job_id)
+
+    async def _reclaimer(self) -> None:
+
+        # A job claimed by a process that crashed stays "running" forever
+        # unless something hands it back
+        while True:
+            try:
+                for job_id in await self._requeue_stale():
+                    print(f"Requeued job {job_id}, its worker stopped responding")
+                    self.backend.notify(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job reclaim error: {e}")
+
+            await asyncio.sleep(max(self.stale_after / 4, self.poll_interval))
+
+    async def _requeue_stale(self) -> List[str]:
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(GenerationJob.id)
+                .where(GenerationJob.status == "running", GenerationJob.started_at < cutoff)
+            )
+            job_ids = list(result.scalars())
+            if not job_ids:
+                return []
+
+            # Conditional, so a job that finished meanwhile is left alone
+            # and only one process requeues each job
+            requeued = []
+            for job_id in job_ids:
+                result = await db.execute(
+                    update(GenerationJob)
+                    .where(
+                        GenerationJob.id == job_id,
+                        GenerationJob.status == "running",
+                        GenerationJob.started_at < cutoff,
+                    )
+                    .values(status="queued", started_at=None)
+                )
+                if result.rowcount == 1:
+                    requeued.append(job_id)
+            await db.commit()
+
+        return requeued
+
+    async def _run(self, job_id: str) -> None:
+        job = await self._claim(job_id)
+        if job is None:
+            return
+
+        kwargs = json.loads(job.payload)
+
+        # Templates travel in the payload as plain fields
+        if kwargs.get("template") is not None:
+            kwargs["template"] = CustomTemplate(**kwargs["template"])
+
+        try:
+            result = await HANDLERS[job.kind](**kwargs)
+            values = {"status": "succeeded", "result": json.dumps(result)}
+
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back for the next worker
+            await self._set(job_id, status="queued", started_at=None)
+            raise
+
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            values = {"status": "failed", "error": str(e)}
+
+        await self._set(job_id, finished_at=datetime.utcnow(), **values)
+
+        for event in self._waiters.get(job_id, ()):
+            event.set()
+
+    async def _claim(self, job_id: str) -> Optional[GenerationJob]:
+
+        # Only one worker, in any process, moves a job out of "queued"
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id, GenerationJob.status == "queued")
+                .values(status="running", started_at=datetime.utcnow())
+            )
+            await db.commit()
+
+            if result.rowcount != 1:
+                return None
+
+            return await db.get(GenerationJob, job_id)
+
+    async def _set(self, job_id: str, **values) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id)
+                .values(**values)
+            )
+            await db.commit()
+
+
+def _create_backend():
+
+    if settings.JOB_QUEUE_BACKEND == "memory":
+        return MemoryQueueBackend()
+
+    if settings.JOB_QUEUE_BACKEND == "database":
+        return DatabaseQueueBackend(poll_interval=settings.JOB_POLL_INTERVAL_SECONDS)
+
+    raise ValueError(f"Unknown JOB_QUEUE_BACKEND: {settings.JOB_QUEUE_BACKEND}")
+
+
+job_queue = JobQueue(
+    _create_backend(),
+    workers=settings.JOB_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    stale_after=settings.JOB_STALE_SECONDS,
+)
@@ -0,0 +1,262 @@
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+
+PathItem = Union[str, int]
+Path = Tuple[PathItem, ...]
+
+# ("delta", field, text) for streamed string fields and
+# ("value", path, value) for every field that has just closed
+Event = Tuple[str, Any, Any]
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = set(',}] \t\r\n')
+
+
+class _Frame:
+
+    __slots__ = ("kind", "path", "start", "key", "expect_key", "index")
+
+    def __init__(self, kind: str, path: Path, start: int):
+        self.kind = kind            # "{" or "["
+        self.path = path            # path of this container from the root
+        self.start = start          # offset of the opening bracket
+        self.key: Optional[str] = None
+        self.expect_key = kind == "{"
+        self.index = 0
+
+
+class StreamingJSONParser:
+    """
+    Incremental parser for the JSON object streamed back by the model.
+
+    feed() reports each value as soon as it closes, down to max_depth levels
+    (so "resume_data.experience[i]" with the default of 3), and the decoded
+    text of selected top-level string fields while they are still being
+    generated. recover() rebuilds every completed field when the text stops
+    early, e.g. when the model hits max_output_tokens.
+    """
+
+    def __init__(self, stream_fields: Iterable[str] = (), max_depth: int = 3):
+        self.stream_fields = set(stream_fields)
+        self.max_depth = max_depth
+        self.text = ""
+
+        self.complete = False
+        self._result: Any = None
+        self._tree: Dict[str, Any] = {}
+
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._scalar_start: Optional[int] = None
+
+        # Field currently being streamed and how far it has been emitted
+        self._streaming_field: Optional[str] = None
+        self._streamed_upto = 0
+
+    def feed(self, chunk: str) -> List[Event]:
+        """Consume a chunk of model output and return the new events."""
+
+        self.text += chunk
+        events: List[Event] = []
+
+        text = self.text
+        i = self._pos
+        n = len(text)
+
+        while i < n:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+
+                # Jump straight to the next quote or backslash
+                match = _STRING_SPECIAL.search(text, i)
+                if match is None:
+                    i = n
+                    break
+
+                j = match.start()
+                if text[j] == "\\":
+                    self._escape = True
+                    i = j + 1
+                    continue
+
+                self._in_string = False
+                self._end_string(j, events)
+                i = j + 1
+                continue
+
+            c = text[i]
+
+            if self._scalar_start is not None and c in _SCALAR_END:
+                self._end_scalar(i, events)
+
+            if c == '"':
+                self._start_string(i)
+            elif c == "{" or c == "[":
+                self._stack.append(_Frame(c, self._value_path(), i))
+            elif c == "}" or c == "]":
+                if self._stack:
+                    frame = self._stack.pop()
+                    self._end_value(frame.path, frame.start, i + 1, events)
+            elif c == ",":
+                frame = self._stack[-1] if self._stack else None
+                if frame is not None:
+                    if frame.kind == "{":
+                        frame.key = None
+                        frame.expect_key = True
+                    else:
+                        frame.index += 1
+            elif c in _SCALAR_END or c == ":":
+                pass
+            elif self._scalar_start is None:
+                self._scalar_start = i
+
+            i += 1
+
+        self._pos = i
+
+        # Flush whatever part of the streamed string is complete so far
+        if self._streaming_field is not None:
+            end = self._safe_string_end(n)
+            if end > self._streamed_upto:
+                piece = self._decode(self._streamed_upto, end)
+
+                # Keep a high surrogate back until its pair arrives
+                if "\ud800" <= piece[-1] <= "\udbff":
+                    piece = piece[:-1]
+                    end -= 6
+
+                if piece:
+                    events.append(("delta", self._streaming_field, piece))
+                    self._streamed_upto = end
+
+        return events
+
+    def result(self) -> Any:
+        """The fully parsed document. Raises ValueError if it is incomplete."""
+
+        if not self.complete:
+            raise ValueError("JSON document is incomplete")
+        return self._result
+
+    def recover(self) -> Dict[str, Any]:
+        """Every field that closed before the text ended."""
+
+        if self.complete and isinstance(self._result, dict):
+            return self._result
+        return self._tree
+
+    def _value_path(self) -> Path:
+        if not self._stack:
+            return ()
+
+        frame = self._stack[-1]
+        if frame.kind == "{":
+            return frame.path + (frame.key,)
+        return frame.path + (frame.index,)
+
+    def _start_string(self, i: int) -> None:
+        self._in_string = True
+        self._string_start = i + 1
+
+        frame = self._stack[-1] if self._stack else None
+        is_value = frame is not None and frame.kind == "{" and not frame.expect_key
+
+        if is_value and len(self._stack) == 1 and frame.key in self.stream_fields:
+            self._streaming_field = frame.key
+            self._streamed_upto = i + 1
+
+    def _end_string(self, i: int, events: List[Event]) -> None:
+        frame = self._stack[-1] if self._stack else None
+
+        if frame is not None and frame.kind == "{" and frame.expect_key:
+            frame.key = self._decode(self._string_start, i)
+            frame.expect_key = False
+            return
+
+        if self._streaming_field is not None:
+            if i > self._streamed_upto:
+                events.append(("delta", self._streaming_field, self._decode(self._streamed_upto, i)))
+            self._streaming_field = None
+
+        self._end_value(self._value_path(), self._string_start - 1, i + 1, events)
+
+    def _end_scalar(self, i: int, events: List[Event]) -> None:
+        start = self._scalar_start
+        self._scalar_start = None
+        self._end_value(self._value_path(), start, i, events)
+
+    def _end_value(self, path: Path, start: int, end: int, events: List[Event]) -> None:
+
+        # Values nested below max_depth are only decoded with their parent
+        if len(path) > self.max_depth:
+            return
+
+        value = json.loads(self.text[start:end], strict=False)
+
+        if not path:
+            self.complete = True
+            self._result = value
+            return
+
+        self._store(path, value)
+        events.append(("value", path, value))
+
+    def _store(self, path: Path, value: Any) -> None:
+
+        # A list item is only kept once it is whole, so a half-written
+        # changes_made entry never shows up without its rationale
+        if any(isinstance(key, int) for key in path[:-1]):
+            return
+
+        node: Any = self._tree
+
+        for key, next_key in zip(path, path[1:]):
+            node = node.setdefault(key, [] if isinstance(next_key, int) else {})
+
+        last = path[-1]
+        if isinstance(node, list) and last >= len(node):
+            node.append(value)
+        else:
+            node[last] = value
+
+    def _safe_string_end(self, end: int) -> int:
+
+        # Never split an escape sequence across two emitted pieces
+        if self._escape:
+            return end - 1
+
+        start = max(self._streamed_upto, end - 5)
+        k = self.text.rfind("\\u", start, end)
+        if k != -1 and end - k < 6:
+            backslashes = 0
+            while k - backslashes - 1 >= self._streamed_upto and self.text[k - backslashes - 1] == "\\":
+                backslashes += 1
+            if backslashes % 2 == 0:
+                return k
+
+        return end
+
+    def _decode(self, start: int, end: int) -> str:
+        return json.loads('"' + self.text[start:end] + '"', strict=False)
+
+
+def parse_json_document(text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parse a complete model response, falling back to the completed fields of
+    a truncated one. Returns (data, complete).
+    """
+
+    try:
+        return json.loads(text), True
+    except json.JSONDecodeError:
+        parser = StreamingJSONParser()
+        parser.feed(text)
+        return parser.recover(), False
@@ -0,0 +1,41 @@
+# LaTeX escaping shared by the resume and cover letter renderers.
+#
+# Order matters: backslashes are escaped first, and the braces of
+# \textbackslash{} are then escaped by the brace rules. Changing the order
+# changes the rendered output.
+_LATEX_REPLACEMENTS = (
+    ('\\', r'\textbackslash{}'),
+    ('&', r'\&'),
+    ('%', r'\%'),
+    ('$', r'\$'),
+    ('#', r'\#'),
+    ('_', r'\_'),
+    ('{', r'\{'),
+    ('}', r'\}'),
+    ('~', r'\textasciitilde{}'),
+    ('^', r'\textasciicircum{}'),
+)
+
+
+def escape_latex(text: str) -> str:
+
+    if not text:
+        return text
+
+    # Most bullets contain none or only one or two of these characters. The
+    # membership test is a fast C scan, so replace() only runs when needed.
+    # On CPython this beats both str.translate with multi-character values
+    # and a regex with a dispatch callback for strings of this size.
+    for old, new in _LATEX_REPLACEMENTS:
+        if old in text:
+            text = text.replace(old, new)
+
+    return text
+
+
+def escape_latex_url(text: str) -> str:
+
+    if not text:
+        return text
+
+    return text.replace('_', r'\_')
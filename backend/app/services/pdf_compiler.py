@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import os
+import resource
+import shutil
+import signal
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.default_templates import DEFAULT_RESUME_TEMPLATE
+from app.services.ttl_cache import TTLCache
+
+
+BEGIN_DOCUMENT = r"\begin{document}"
+
+MB = 1024 * 1024
+
+
+class LatexCompileError(Exception):
+    """The document didn't compile. log holds the end of the TeX log."""
+
+    def __init__(self, message: str, log: str = ""):
+        super().__init__(message)
+        self.log = log
+
+
+class PdfCompilerUnavailable(Exception):
+    """No TeX engine is installed, or no compile slot freed up in time."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def pdf_key(latex: str) -> str:
+
+    # The engine is part of the key: the same source compiles differently
+    # under pdflatex and xelatex
+    digest = hashlib.sha256()
+    digest.update(settings.PDF_ENGINE.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(latex.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _split_preamble(latex: str) -> Tuple[str, str]:
+
+    preamble, found, body = latex.partition(BEGIN_DOCUMENT)
+    if not found:
+        return "", latex
+    return preamble.strip(), found + body
+
+
+def _format_name(preamble: str) -> str:
+    return "preamble-" + hashlib.sha256(preamble.encode("utf-8")).hexdigest()[:16]
+
+
+def _limit_resources() -> None:
+
+    # Runs in the child before exec. The wall-clock timeout is enforced by
+    # the parent; these stop a runaway run from taking the host with it.
+    cpu = int(settings.PDF_COMPILE_TIMEOUT_SECONDS) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    resource.setrlimit(resource.RLIMIT_AS, (settings.PDF_MEMORY_LIMIT_MB * MB,) * 2)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (settings.PDF_MAX_OUTPUT_MB * MB,) * 2)
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+class PdfCompiler:
+    """
+    Compiles LaTeX to PDF with a local TeX engine, a few documents at a
+    time. Documents that start with a known preamble are compiled against
+    a format file with that preamble already loaded, so each run only
+    typesets the body. Finished PDFs are cached by content hash.
+    """
+
+    def __init__(self, engine: str, workers: int, cache: TTLCache):
+        self.engine = engine
+        self.workers = workers
+        self.cache = cache
+        self._executable: Optional[str] = None
+        self._root: Optional[str] = None
+
+        # One work directory per compile slot; taking a directory takes the slot
+        self._slots: Optional[asyncio.Queue] = None
+
+        # Preamble -> format name, for formats that built and loaded cleanly
+        self._formats: Dict[str, str] = {}
+
+        # Compiles in flight by key, shared by identical requests
+        self._in_flight: Dict[str, "asyncio.Task[bytes]"] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.compiles = 0
+        self.format_compiles = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.compile_seconds = 0.0
+
+    async def start(self) -> None:
+        self._executable = shutil.which(self.engine)
+        if self._executable is None:
+            print(f"{self.engine} not found, PDF compilation is disabled")
+            return
+
+        self._root = settings.PDF_WORK_DIR or tempfile.mkdtemp(prefix="job-copilot-latex-")
+        os.makedirs(os.path.join(self._root, "formats"), exist_ok=True)
+
+        self._slots = asyncio.Queue()
+        for index in range(self.workers):
+            slot = os.path.join(self._root, f"slot-{index}")
+            os.makedirs(slot, exist_ok=True)
+            self._slots.put_nowait(slot)
+
+        # Warm up with the default resume preamble, which almost every
+        # request uses
+        preamble, _ = _split_preamble(DEFAULT_RESUME_TEMPLATE)
+        await self._build_format(preamble)
+
+    async def stop(self) -> None:
+        tasks = list(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._root is not None and not settings.PDF_WORK_DIR:
+            shutil.rmtree(self._root, ignore_errors=True)
+
+    async def compile(self, latex: str) -> bytes:
+
+        if self._slots is None:
+            raise PdfCompilerUnavailable(f"PDF compilation is not available: {self.engine} is not installed")
+
+        key = pdf_key(latex)
+
+        pdf = self.cache.get(key)
+        if pdf is not None:
+            self.hits += 1
+            return pdf
+
+        task = self._in_flight.get(key)
+
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._compile(latex))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+
+        if task.cancelled():
+            return
+        # Large PDFs are left out so a few of them can't evict everything else
+        if task.exception() is None and len(task.result()) <= settings.PDF_CACHE_MAX_PDF_MB * MB:
+            self.cache.set(key, task.result())
+
+    async def _compile(self, latex: str) -> bytes:
+
+        preamble, body = _split_preamble(latex)
+        format_name = self._formats.get(preamble)
+
+        slot = await self._take_slot()
+        try:
+            if format_name is not None:
+                return await self._run(slot, body, format_name)
+            return await self._run(slot, latex)
+        finally:
+            self._release_slot(slot)
+
+    async def _take_slot(self) -> str:
+        try:
+            return await asyncio.wait_for(self._slots.get(), settings.PDF_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise PdfCompilerUnavailable(
+                "All PDF compile slots are busy",
+                retry_after=settings.PDF_COMPILE_TIMEOUT_SECONDS,
+            )
+
+    def _release_slot(self, slot: str) -> None:
+
+        # Nothing from one document is visible to the next
+        for name in os.listdir(slot):
+            path = os.path.join(slot, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+        self._slots.put_nowait(slot)
+
+    async def _build_format(self, preamble: str) -> None:
+
+        name = _format_name(preamble)
+        formats = os.path.join(self._root, "formats")
+
+        with open(os.path.join(formats, f"{name}.tex"), "w", encoding="utf-8") as f:
+            f.write(preamble + "\n\\dump\n")
+
+        try:
+            await self._execute(
+                ["-ini", f"-jobname={name}", f"&{self.engine}", f"{name}.tex"],
+                cwd=formats,
+            )
+
+            # Some packages don't survive being dumped; only use the format
+            # if a trivial document compiles against it
+            slot = await self._take_slot()
+            try:
+                await self._run(slot, BEGIN_DOCUMENT + "\nok\n\\end{document}\n", name)
+            finally:
+                self._release_slot(slot)
+
+        except (LatexCompileError, PdfCompilerUnavailable) as e:
+            print(f"Could not build a LaTeX format, compiling documents in full: {e} {getattr(e, 'log', '')}")
+            return
+
+        self._formats[preamble] = name
+
+    async def _run(self, slot: str, source: str, format_name: Optional[str] = None) -> bytes:
+
+        with open(os.path.join(slot, "main.tex"), "w", encoding="utf-8") as f:
+            f.write(source)
+
+        args: List[str] = []
+        if format_name is not None:
+            args.append(f"-fmt={format_name}")
+        args.append("main.tex")
+
+        started = time.monotonic()
+
+        # A second pass settles anything the first one wrote to the .aux file
+        for _ in range(2):
+            log = await self._execute(args, cwd=slot)
+            if "Rerun to get" not in log:
+                break
+
+        self.compiles += 1
+        if format_name is not None:
+            self.format_compiles += 1
+        self.compile_seconds += time.monotonic() - started
+
+        try:
+            with open(os.path.join(slot, "main.pdf"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            self.failures += 1
+            raise LatexCompileError("LaTeX compilation produced no pages", log=log[-2000:])
+
+    async def _execute(self, args: List[str], cwd: str) -> str:
+
+        env = {
+            "PATH": os.environ.get("PATH", ""),
+            "HOME": cwd,
+            "TEXMFOUTPUT": cwd,
+            "TEXFORMATS": os.path.join(self._root, "formats") + ":",
+            # No reading or writing outside the work directory, no shell
+            "openin_any": "p",
+            "openout_any": "p",
+            "shell_escape": "f",
+        }
+
+        process = await asyncio.create_subprocess_exec(
+            self._executable,
+            "-no-shell-escape",
+            "-interaction=nonstopmode",
+            "-halt-on-error",
+            *args,
+            cwd=cwd,
+            env=env,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            preexec_fn=_limit_resources,
+            start_new_session=True,
+        )
+
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), settings.PDF_COMPILE_TIMEOUT_SECONDS)
+
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # Kill the whole process group, not just the engine
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timeouts += 1
+            raise LatexCompileError(
+                f"LaTeX compilation timed out after {settings.PDF_COMPILE_TIMEOUT_SECONDS:g}s"
+            )
+
+        log = output.decode("utf-8", errors="replace")
+
+        if process.returncode != 0:
+            self.failures += 1
+            raise LatexCompileError("LaTeX compilation failed", log=log[-2000:])
+
+        return log
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "engine": self.engine,
+            "available": self._slots is not None,
+            "formats": len(self._formats),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "compiles": self.compiles,
+            "format_compiles": self.format_compiles,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "avg_compile_seconds": self.compile_seconds / self.compiles if self.compiles else 0.0,
+            "cached_pdfs": len(self.cache),
+            "cached_bytes": self.cache.bytes,
+        }
+
+
+pdf_compiler = PdfCompiler(
+    engine=settings.PDF_ENGINE,
+    workers=settings.PDF_WORKERS,
+    cache=TTLCache(
+        max_entries=settings.PDF_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.PDF_CACHE_TTL_SECONDS,
+        max_bytes=settings.PDF_CACHE_MAX_MB * MB,
+    ),
+)
@@ -1,11 +1,9 @@
-def get_prompt(job_description: str, master_resume: str) -> str:
-    return f"""You are an expert resume strategist. Your task is to tailor a resume for a specific job posting while preserving the candidate's authentic voice and ensuring all claims remain verifiable.
+import hashlib
 
-JOB DESCRIPTION:
-{job_description}
 
-MASTER RESUME:
-{master_resume}
+# Sent once as the model's system instruction (and stored in a Gemini
+# context cache where available); only get_prompt's part varies per call.
+SYSTEM_INSTRUCTION = """You are an expert resume strategist. Your task is to tailor a resume for a specific job posting while preserving the candidate's authentic voice and ensuring all claims remain verifiable.
 
 TAILORING PROCESS:
 
@@ -34,26 +32,26 @@ TAILORING PROCESS:
    - Every claim must be based on something in the master resume
 
 Return your response as a JSON object with this EXACT structure:
-{{
+{
   "tailored_resume": "The complete tailored resume in PLAIN TEXT format",
-  "resume_data": {{
-    "contact": {{
+  "resume_data": {
+    "contact": {
       "name": "Candidate's full name from the master resume",
       "phone": "Phone number or null",
       "email": "Email address or null",
       "linkedin": "linkedin.com/in/username (without https://) or null",
       "github": "github.com/username (without https://) or null"
-    }},
+    },
     "education": [
-      {{
+      {
         "school": "University Name",
         "location": "City, State/Province",
         "degree": "Degree name (e.g., Bachelor of Computer Engineering)",
         "dates": "Start -- End (e.g., Sep. 2024 -- Jun. 2028)"
-      }}
+      }
     ],
     "experience": [
-      {{
+      {
         "company": "Company Name (Department/Team if applicable)",
         "location": "City, State/Province",
         "title": "Job Title",
@@ -64,10 +62,10 @@ Return your response as a JSON object with this EXACT structure:
           "Third bullet point",
           "Fourth bullet point (include 4-6 bullets per experience)"
         ]
-      }}
+      }
     ],
     "projects": [
-      {{
+      {
         "name": "Project Name",
         "technologies": "Tech1, Tech2, Tech3",
         "bullets": [
@@ -75,25 +73,25 @@ Return your response as a JSON object with this EXACT structure:
           "Second bullet point",
           "Third bullet point (include 3-4 bullets per project)"
         ]
-      }}
+      }
     ],
-    "skills": {{
+    "skills": {
       "languages": "Java, Python, JavaScript, TypeScript, etc.",
       "frameworks": "React, FastAPI, Flask, Node.js, etc.",
       "tools": "Git, Docker, AWS, etc."
-    }}
-  }},
+    }
+  },
   "changes_made": [
-    {{
+    {
       "change": "Description of the specific change",
       "rationale": "Why this change improves job alignment"
-    }}
+    }
   ],
   "keywords_matched": ["keyword1", "keyword2", "keyword3"],
   "keywords_missing": ["missing1", "missing2"],
   "keyword_variants_used": ["original term -> job posting term"],
   "clarifying_questions": ["Question about potential experience not clearly stated in resume"]
-}}
+}
 
 CRITICAL REQUIREMENTS:
 1. Extract the candidate's REAL name and contact info from the master resume - do NOT use placeholder names
@@ -114,4 +112,20 @@ OUTPUT REQUIREMENTS:
 - "keywords_missing": Important keywords the candidate genuinely lacks
 - "keyword_variants_used": Any terminology translations applied
 - "clarifying_questions": 1-3 questions about experiences that could strengthen the resume
-"""
\ No newline at end of file
+"""
+
+
+def get_prompt(job_description: str, master_resume: str) -> str:
+    return f"""JOB DESCRIPTION:
+{job_description}
+
+MASTER RESUME:
+{master_resume}
+"""
+
+
+# Changes whenever the prompt template text changes, so cached results
+# produced by an older prompt are never served.
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_INSTRUCTION + get_prompt("", "")).encode("utf-8")
+).hexdigest()
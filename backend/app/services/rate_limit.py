@@ -0,0 +1,161 @@
+import asyncio
+import collections
+import time
+from typing import Deque, Dict
+
+
+class RateLimited(Exception):
+    """Raised when a call can't be admitted before its deadline."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Refills at per_minute tokens per minute, up to a minute's worth.
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float, deadline: float) -> None:
+
+        # A single call larger than the bucket still goes through once it is full
+        amount = min(amount, self.capacity)
+
+        try:
+            await asyncio.wait_for(self._lock.acquire(), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            raise RateLimited("Rate limit queue is full", retry_after=amount / self.rate)
+
+        try:
+            self._refill()
+            wait = max(amount - self.tokens, 0) / self.rate
+
+            if time.monotonic() + wait > deadline:
+                raise RateLimited("Rate limit exceeded", retry_after=wait)
+
+            if wait > 0:
+                await asyncio.sleep(wait)
+                self._refill()
+
+            self.tokens -= amount
+
+        finally:
+            self._lock.release()
+
+    def debit(self, amount: float) -> None:
+
+        # Settles the difference between an estimate and actual usage. The
+        # bucket may go negative, which delays the calls that follow.
+        self._refill()
+        self.tokens -= amount
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that adapts AIMD-style: it grows by about one per
+    round of successful calls and halves when the upstream reports
+    overload, at most once per cooldown. No new calls are admitted until
+    the cooldown after an overload has passed.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, cooldown: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+
+    async def acquire(self, deadline: float) -> None:
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            if time.monotonic() + pause > deadline:
+                raise RateLimited("Backing off after a quota error", retry_after=pause)
+            await asyncio.sleep(pause)
+
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter, max(deadline - time.monotonic(), 0))
+
+        except asyncio.TimeoutError:
+            # release() may have handed over a slot just as the wait ran out
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise RateLimited("Too many Gemini calls in flight", retry_after=self.cooldown)
+
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def succeeded(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self._wake()
+
+    def overloaded(self) -> None:
+        now = time.monotonic()
+
+        # A burst of 429s from the same moment counts as one signal
+        if now - self._last_decrease >= self.cooldown:
+            self.limit = max(self.minimum, self.limit / 2)
+            self._last_decrease = now
+            self._paused_until = now + self.cooldown
+
+    def _wake(self) -> None:
+
+        # Slots are handed over directly, so a newcomer can't jump the queue
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class WaitStats:
+    """Running totals of how long calls waited to be admitted."""
+
+    def __init__(self):
+        self.admitted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.admitted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "avg_wait_seconds": self.total_wait / self.admitted if self.admitted else 0.0,
+            "max_wait_seconds": self.max_wait,
+        }
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import weakref
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.resume import Resume
+from app.services import resume_versions
+from app.services.ttl_cache import TTLCache
+
+
+# Dialects that support INSERT ... ON CONFLICT ... RETURNING
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Attempts for a save that collides with a concurrent one
+SAVE_ATTEMPTS = 5
+
+# user_id -> lock held while saving. Saves from one worker take turns, so
+# only saves racing in from other workers need the retries.
+_save_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# user_id -> raw_text of the master resume, so AI calls that omit the
+# resume do not hit the database every time
+_master_resumes = TTLCache(
+    max_entries=settings.RESUME_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESUME_CACHE_TTL_SECONDS,
+)
+
+
+def resume_etag(resume: Resume) -> str:
+
+    # Changes whenever the text or the save time changes
+    digest = hashlib.sha256()
+    digest.update(resume.raw_text.encode("utf-8"))
+    digest.update(resume.updated_at.isoformat().encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+async def get_master_resume_text(db: AsyncSession, user_id: int) -> Optional[str]:
+
+    raw_text = _master_resumes.get(user_id)
+    if raw_text is not None:
+        return raw_text
+
+    result = await db.execute(select(Resume.raw_text).where(Resume.user_id == user_id))
+    raw_text = result.scalar_one_or_none()
+
+    if raw_text is not None:
+        _master_resumes.set(user_id, raw_text)
+
+    return raw_text
+
+
+def invalidate_master_resume(user_id: int) -> None:
+
+    # Only clears this worker's cache; other workers catch up within the TTL
+    _master_resumes.delete(user_id)
+
+
+async def upsert_master_resume(db: AsyncSession, user_id: int, raw_text: str) -> Resume:
+
+    lock = _save_locks.get(user_id)
+    if lock is None:
+        lock = _save_locks[user_id] = asyncio.Lock()
+
+    async with lock:
+        for attempt in range(SAVE_ATTEMPTS):
+            try:
+                resume = await _save_master_resume(db, user_id, raw_text)
+                break
+            except IntegrityError:
+                # A concurrent save took the same version number; try again
+                await db.rollback()
+                if attempt == SAVE_ATTEMPTS - 1:
+                    raise
+
+    _master_resumes.set(user_id, resume.raw_text)
+
+    return resume
+
+
+async def _save_master_resume(db: AsyncSession, user_id: int, raw_text: str) -> Resume:
+
+    # The previous text is needed to store the new version as a delta. It
+    # is read in the same statement as the latest version number, so the
+    # pair is consistent.
+    result = await db.execute(select(
+        select(Resume.raw_text).where(Resume.user_id == user_id).scalar_subquery(),
+        resume_versions.latest_version_subquery(user_id),
+    ))
+    previous_text, latest_version = result.one()
+
+    insert = UPSERT_INSERTS.get(db.bind.dialect.name)
+
+    if insert is not None:
+        now = datetime.utcnow()
+
+        # Concurrent first saves from the same user resolve on the unique
+        # user_id instead of racing into an IntegrityError.
+        stmt = insert(Resume).values(
+            user_id=user_id,
+            raw_text=raw_text,
+            created_at=now,
+            updated_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Resume.user_id],
+            set_={
+                "raw_text": stmt.excluded.raw_text,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        ).returning(Resume)
+
+        result = await db.execute(stmt, execution_options={"populate_existing": True})
+        resume = result.scalar_one()
+
+    # Fallback for dialects without ON CONFLICT support
+    else:
+        result = await db.execute(select(Resume).where(Resume.user_id == user_id))
+        resume = result.scalar_one_or_none()
+
+        if resume:
+            resume.raw_text = raw_text
+        else:
+            resume = Resume(user_id=user_id, raw_text=raw_text)
+            db.add(resume)
+
+    if raw_text != previous_text:
+        await resume_versions.add_version(db, user_id, latest_version, previous_text, raw_text)
+
+    await db.commit()
+
+    if insert is None:
+        await db.refresh(resume)
+
+    return resume
@@ -0,0 +1,135 @@
+import difflib
+import json
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.resume_version import ResumeVersion
+
+
+def make_delta(old_text: str, new_text: str) -> str:
+
+    # Line-based delta: [start, end] copies old lines start:end, a string
+    # inserts new text. Deleted lines are simply not copied.
+    old_lines = old_text.splitlines(keepends=True)
+    new_lines = new_text.splitlines(keepends=True)
+
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(new_lines[j1:j2]))
+
+    return json.dumps(ops, separators=(",", ":"))
+
+
+def apply_delta(old_text: str, delta: str) -> str:
+
+    old_lines = old_text.splitlines(keepends=True)
+    parts = []
+
+    for op in json.loads(delta):
+        if isinstance(op, list):
+            parts.extend(old_lines[op[0]:op[1]])
+        else:
+            parts.append(op)
+
+    return "".join(parts)
+
+
+async def add_version(
+    db: AsyncSession,
+    user_id: int,
+    latest_version: int,
+    previous_text: Optional[str],
+    new_text: str
+) -> None:
+
+    # Adds the row to the session; the caller commits with the resume save.
+    # latest_version must be read together with previous_text: if another
+    # save got in between, the unique (user_id, version) constraint rejects
+    # this row and the caller retries with fresh values.
+    version = latest_version + 1
+
+    # A full snapshot every RESUME_SNAPSHOT_INTERVAL versions keeps
+    # reconstruction to a bounded number of deltas
+    is_snapshot = previous_text is None or latest_version % settings.RESUME_SNAPSHOT_INTERVAL == 0
+    content = new_text
+
+    if not is_snapshot:
+        content = make_delta(previous_text, new_text)
+
+        # A rewrite from scratch is cheaper to store in full
+        if len(content) >= len(new_text):
+            is_snapshot = True
+            content = new_text
+
+    db.add(ResumeVersion(
+        user_id=user_id,
+        version=version,
+        is_snapshot=is_snapshot,
+        content=content,
+    ))
+
+
+async def list_versions(db: AsyncSession, user_id: int) -> List[ResumeVersion]:
+
+    result = await db.execute(
+        select(ResumeVersion)
+        .where(ResumeVersion.user_id == user_id)
+        .order_by(ResumeVersion.version.desc())
+    )
+    return list(result.scalars())
+
+
+async def get_version(
+    db: AsyncSession,
+    user_id: int,
+    version: int
+) -> Optional[Tuple[ResumeVersion, str]]:
+
+    # Nearest snapshot at or before the requested version
+    snapshot = (
+        select(func.max(ResumeVersion.version))
+        .where(
+            ResumeVersion.user_id == user_id,
+            ResumeVersion.is_snapshot.is_(True),
+            ResumeVersion.version <= version,
+        )
+        .scalar_subquery()
+    )
+
+    # The snapshot and every delta up to the version, in one query
+    result = await db.execute(
+        select(ResumeVersion)
+        .where(
+            ResumeVersion.user_id == user_id,
+            ResumeVersion.version >= snapshot,
+            ResumeVersion.version <= version,
+        )
+        .order_by(ResumeVersion.version)
+    )
+    rows = list(result.scalars())
+
+    if not rows or rows[-1].version != version:
+        return None
+
+    text = rows[0].content
+    for row in rows[1:]:
+        text = row.content if row.is_snapshot else apply_delta(text, row.content)
+
+    return rows[-1], text
+
+
+def latest_version_subquery(user_id: int):
+    return (
+        select(func.coalesce(func.max(ResumeVersion.version), 0))
+        .where(ResumeVersion.user_id == user_id)
+        .scalar_subquery()
+    )
+
+
+async def delete_versions(db: AsyncSession, user_id: int) -> None:
+    await db.execute(delete(ResumeVersion).where(ResumeVersion.user_id == user_id))
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from app.config import settings
+from app.services.ttl_cache import TTLCache
+
+
+def normalize_job_description(job_description: str) -> str:
+
+    # Scraped postings differ only in whitespace between clicks
+    return " ".join(job_description.split())
+
+
+def make_cache_key(
+    job_description: str,
+    master_resume: str,
+    prompt_version: str,
+    model_name: str,
+) -> str:
+
+    digest = hashlib.sha256()
+    for part in (
+        normalize_job_description(job_description),
+        master_resume,
+        prompt_version,
+        model_name,
+    ):
+        digest.update(part.encode("utf-8"))
+        # Separator so ("ab", "c") and ("a", "bc") hash differently
+        digest.update(b"\x00")
+
+    return digest.hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with TTL. Entries are lost on restart."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self._cache.set(key, value)
+
+    def size(self) -> int:
+        return len(self._cache)
+
+
+class SQLiteCacheBackend:
+    """On-disk cache stored in a SQLite table, shared by all workers on a host."""
+
+    blocking = True
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tailor_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM tailor_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            value, expires_at = row
+            if expires_at <= time.time():
+                self._conn.execute("DELETE FROM tailor_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tailor_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl_seconds),
+            )
+            # Drop expired rows so the table does not grow forever
+            self._conn.execute("DELETE FROM tailor_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tailor_cache").fetchone()[0]
+
+
+class TailorCache:
+    """Result cache for tailor_resume with hit/miss counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    async def _call(self, fn, *args):
+        # The SQLite backend touches disk, so keep it off the event loop
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.backend is None:
+            return None
+
+        value = await self._call(self.backend.get, key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(value)
+
+    async def set(self, key: str, result: Dict[str, Any]) -> None:
+        if self.backend is None:
+            return
+
+        await self._call(self.backend.set, key, json.dumps(result))
+        self.stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": settings.TAILOR_CACHE_BACKEND,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self.backend.size() if self.backend is not None else 0,
+        }
+
+
+def _create_backend():
+
+    if settings.TAILOR_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(
+            max_entries=settings.TAILOR_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.TAILOR_CACHE_TTL_SECONDS,
+        )
+
+    if settings.TAILOR_CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(
+            path=settings.TAILOR_CACHE_SQLITE_PATH,
+            ttl_seconds=settings.TAILOR_CACHE_TTL_SECONDS,
+        )
+
+    if settings.TAILOR_CACHE_BACKEND == "none":
+        return None
+
+    raise ValueError(f"Unknown TAILOR_CACHE_BACKEND: {settings.TAILOR_CACHE_BACKEND}")
+
+
+tailor_cache = TailorCache(_create_backend())
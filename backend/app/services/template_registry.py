@@ -0,0 +1,401 @@
+import asyncio
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+from jinja2 import Environment, BaseLoader, nodes, pass_environment, Template as JinjaTemplate
+from jinja2.filters import make_attrgetter
+from jinja2.sandbox import ImmutableSandboxedEnvironment, SecurityError
+from markupsafe import Markup
+from sqlalchemy import event
+from app.config import settings
+from app.models.template import Template
+from app.services.latex_escape import escape_latex
+
+
+# Upper bound on compiled templates kept in memory (defaults + user templates)
+MAX_COMPILED_TEMPLATES = 256
+
+
+def _escape_output(value):
+
+    # Every << value >> is LaTeX-escaped as it is written out, so renderers
+    # pass the model's data straight in. Values marked "| safe" in the
+    # template (URLs, email addresses) are written as they are.
+    if isinstance(value, str) and not isinstance(value, Markup):
+        return escape_latex(value)
+    return value
+
+
+def _environment(cls=Environment) -> Environment:
+
+    # LaTeX is full of braces and percent signs, so Jinja's default
+    # delimiters are swapped out
+    environment = cls(
+        loader=BaseLoader(),
+        variable_start_string='<<',
+        variable_end_string='>>',
+        block_start_string='<%',
+        block_end_string='%>',
+        comment_start_string='<#',
+        comment_end_string='#>',
+        autoescape=False,
+        finalize=_escape_output,
+    )
+    # Kept for templates that escape explicitly; marked safe so it isn't escaped twice
+    environment.filters['escape_latex'] = lambda value: Markup(escape_latex(value)) if value else value
+    return environment
+
+
+# Shared by the resume and cover letter renderers for the built-in templates
+env = _environment()
+
+
+class RenderBudget:
+    """Work a single user template render may do before it is stopped."""
+
+    def __init__(self):
+        self.iterations = 0
+        self.deadline = time.monotonic() + settings.TEMPLATE_RENDER_TIMEOUT_SECONDS
+
+    def tick(self) -> None:
+        self.iterations += 1
+        if self.iterations > settings.TEMPLATE_MAX_LOOP_ITERATIONS:
+            raise SecurityError(f"Template loops ran more than {settings.TEMPLATE_MAX_LOOP_ITERATIONS} times")
+        self.check_time()
+
+    def check_time(self) -> None:
+        if time.monotonic() > self.deadline:
+            raise SecurityError(f"Template took longer than {settings.TEMPLATE_RENDER_TIMEOUT_SECONDS:g}s to render")
+
+
+# The budget of the render running on this thread
+_render_state = threading.local()
+
+
+def _budget() -> Optional[RenderBudget]:
+    return getattr(_render_state, "budget", None)
+
+
+def _check_time() -> None:
+
+    # A thread can't be killed, so the render checks its own deadline at
+    # every operator, lookup, filter call and loop step
+    budget = _budget()
+    if budget is not None:
+        budget.check_time()
+
+
+def _check_size(value: Any) -> Any:
+    if hasattr(value, "__len__") and len(value) > settings.TEMPLATE_MAX_OUTPUT_CHARS:
+        raise SecurityError(f"Template value is longer than {settings.TEMPLATE_MAX_OUTPUT_CHARS} characters")
+    return value
+
+
+def _bounded_loop(iterable):
+    budget = _budget()
+    for item in iterable:
+        if budget is not None:
+            budget.tick()
+        yield item
+
+
+# Methods templates may call on their data; other callables (str.center,
+# str.replace, model_dump_json, ...) can allocate without bound
+_SAFE_METHODS = frozenset([
+    "lower", "upper", "title", "capitalize", "strip", "lstrip", "rstrip",
+    "split", "startswith", "endswith", "items", "keys", "values", "get",
+    "cycle", "changed",
+])
+
+# Filters whose output is bounded by their input
+_SAFE_FILTERS = frozenset([
+    "abs", "attr", "capitalize", "count", "d", "default", "dictsort", "e", "escape",
+    "escape_latex", "first", "float", "int", "items", "join", "last", "length", "list",
+    "lower", "map", "max", "min", "reject", "rejectattr", "reverse", "round", "safe",
+    "select", "selectattr", "sort", "string", "striptags", "sum", "title", "trim",
+    "truncate", "unique", "upper", "wordcount",
+])
+
+# Filters that walk a whole sequence in C (list(), sorted(), set(), ...).
+# A sandboxed range() can still feed them 100,000 items, chained as often
+# as the template likes, so each item they take counts against the budget.
+# sum isn't here: it is replaced with one that only adds numbers.
+_ITERATING_FILTERS = frozenset([
+    "join", "list", "map", "max", "min", "reject", "rejectattr", "reverse",
+    "select", "selectattr", "sort", "unique",
+])
+
+
+def _bounded_items(iterable):
+
+    # These filters build their result in one call, so the size of what
+    # goes in is counted as the items arrive rather than checked afterwards
+    length = 0
+    for item in _bounded_loop(iterable):
+        length += len(item) if hasattr(item, "__len__") else 1
+        if length > settings.TEMPLATE_MAX_OUTPUT_CHARS:
+            raise SecurityError(f"Template value is longer than {settings.TEMPLATE_MAX_OUTPUT_CHARS} characters")
+        yield item
+
+
+def _iterating(function: Callable) -> Callable:
+
+    # The value comes after the context/environment for pass_* filters
+    position = 0 if getattr(function, "jinja_pass_arg", None) is None else 1
+
+    @functools.wraps(function)
+    def iterating(*args, **kwargs):
+        value = args[position]
+        # Strings are already bounded by the output size, and reverse and
+        # join treat them differently from other iterables
+        if not isinstance(value, str):
+            args = (*args[:position], _bounded_items(value), *args[position + 1:])
+        return function(*args, **kwargs)
+
+    return iterating
+
+
+@pass_environment
+def _sum_numbers(environment: Environment, iterable, attribute=None, start=0):
+
+    # Jinja's sum is Python's, which will also concatenate lists and
+    # strings in quadratic time without ever returning to the template
+    if attribute is not None:
+        iterable = map(make_attrgetter(environment, attribute), iterable)
+
+    if not isinstance(start, (int, float)):
+        raise SecurityError("Templates can only sum numbers")
+
+    total = start
+    for item in _bounded_loop(iterable):
+        if not isinstance(item, (int, float)):
+            raise SecurityError("Templates can only sum numbers")
+        total += item
+    return total
+
+
+class TemplateSandbox(ImmutableSandboxedEnvironment):
+    """
+    Environment for user templates. On top of Jinja's sandbox (no Python
+    internals, no mutating data), every render is bounded: operators that
+    build large values are checked, loops and output count against a
+    RenderBudget, and the render stops at its deadline.
+    """
+
+    intercepted_binops = frozenset(["*", "**", "+", "%"])
+
+    def call_binop(self, context, operator: str, left: Any, right: Any) -> Any:
+
+        _check_time()
+
+        # Checked before computing: "x" * 10**9 would allocate first
+        if operator == "*":
+            for sequence, count in ((left, right), (right, left)):
+                if hasattr(sequence, "__len__") and isinstance(count, int):
+                    if len(sequence) * count > settings.TEMPLATE_MAX_OUTPUT_CHARS:
+                        raise SecurityError("Template value would be too long")
+            if isinstance(left, int) and isinstance(right, int) and left.bit_length() + right.bit_length() > 4096:
+                raise SecurityError("Template number would be too large")
+
+        if operator == "**" and isinstance(right, (int, float)):
+            base_bits = left.bit_length() if isinstance(left, int) else 64
+            if abs(right) > 1024 or base_bits * abs(right) > 4096:
+                raise SecurityError("Template number would be too large")
+
+        if operator == "%" and isinstance(left, str):
+            raise SecurityError("String formatting is not allowed in templates")
+
+        return _check_size(super().call_binop(context, operator, left, right))
+
+    def getattr(self, obj: Any, attribute: str) -> Any:
+        _check_time()
+        return super().getattr(obj, attribute)
+
+    def getitem(self, obj: Any, argument: Any) -> Any:
+        _check_time()
+        return super().getitem(obj, argument)
+
+    def is_safe_attribute(self, obj: Any, attr: str, value: Any) -> bool:
+        if callable(value) and attr not in _SAFE_METHODS:
+            return False
+        return super().is_safe_attribute(obj, attr, value)
+
+    def _parse(self, source, name, filename):
+
+        # Route every loop through the budget and size-check every "~"
+        tree = super()._parse(source, name, filename)
+
+        for loop in tree.find_all(nodes.For):
+            loop.iter = nodes.Filter(loop.iter, "bounded_loop", [], [], None, None, lineno=loop.lineno)
+
+        for parent in list(tree.find_all(nodes.Node)):
+            for field, value in parent.iter_fields():
+                if isinstance(value, nodes.Concat):
+                    setattr(parent, field, nodes.Filter(value, "bounded_size", [], [], None, None, lineno=value.lineno))
+                elif isinstance(value, list):
+                    for index, item in enumerate(value):
+                        if isinstance(item, nodes.Concat):
+                            value[index] = nodes.Filter(item, "bounded_size", [], [], None, None, lineno=item.lineno)
+
+        return tree
+
+
+def _timed(function: Callable) -> Callable:
+
+    # wraps() keeps Jinja's pass_context/pass_environment markers
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        _check_time()
+        return function(*args, **kwargs)
+
+    return timed
+
+
+def _sandbox() -> TemplateSandbox:
+
+    environment = _environment(TemplateSandbox)
+    environment.filters = {
+        name: _timed(function)
+        for name, function in environment.filters.items()
+        if name in _SAFE_FILTERS
+    }
+    for name in _ITERATING_FILTERS:
+        environment.filters[name] = _iterating(environment.filters[name])
+    environment.filters["sum"] = _timed(_sum_numbers)
+    environment.filters["bounded_loop"] = _bounded_loop
+    environment.filters["bounded_size"] = _check_size
+
+    # lipsum() and namespace() would let a template build output or state
+    # outside the loop budget
+    environment.globals.pop("lipsum", None)
+    environment.globals.pop("namespace", None)
+    return environment
+
+
+# User templates are rendered here, never with env
+sandbox_env = _sandbox()
+
+
+@dataclass(frozen=True)
+class CustomTemplate:
+    """A user's template as of one saved version."""
+
+    key: str
+    source: str
+    version: str
+
+
+def user_template_key(user_id: int, template_id: int) -> str:
+    return f"user:{user_id}:{template_id}"
+
+
+def custom_template(row: Template) -> CustomTemplate:
+
+    # updated_at changes on every save, so an edit made through another
+    # worker process is picked up on the next render here
+    return CustomTemplate(
+        key=user_template_key(row.user_id, row.id),
+        source=row.content,
+        version=row.updated_at.isoformat(),
+    )
+
+
+def validate_template(source: str) -> None:
+
+    # Raises jinja2.TemplateSyntaxError (with a line number) for bad
+    # delimiters or blocks, TemplateAssertionError for unknown filters
+    sandbox_env.from_string(source)
+
+
+# template_id -> (version, compiled template)
+_compiled: "OrderedDict[Hashable, tuple[str, JinjaTemplate]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def content_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def get_template(
+    template_id: Hashable,
+    source: str,
+    version: Optional[str] = None,
+    environment: Environment = env
+) -> JinjaTemplate:
+
+    # Compile each template once and reuse it until its content changes
+    if version is None:
+        version = content_hash(source)
+
+    with _lock:
+        entry = _compiled.get(template_id)
+        if entry is not None and entry[0] == version:
+            _compiled.move_to_end(template_id)
+            return entry[1]
+
+    compiled = environment.from_string(source)
+
+    with _lock:
+        _compiled[template_id] = (version, compiled)
+        _compiled.move_to_end(template_id)
+
+        while len(_compiled) > MAX_COMPILED_TEMPLATES:
+            _compiled.popitem(last=False)
+
+    return compiled
+
+
+def get_custom_template(template: CustomTemplate) -> JinjaTemplate:
+    return get_template(template.key, template.source, template.version, sandbox_env)
+
+
+def render_custom(template: CustomTemplate, **context) -> str:
+
+    # Output is assembled chunk by chunk so an oversized or slow render is
+    # stopped as it happens, not after the fact
+    compiled = get_custom_template(template)
+    budget = RenderBudget()
+    _render_state.budget = budget
+
+    try:
+        chunks = []
+        length = 0
+
+        for chunk in compiled.generate(**context):
+            length += len(chunk)
+            if length > settings.TEMPLATE_MAX_OUTPUT_CHARS:
+                raise SecurityError(f"Template output is longer than {settings.TEMPLATE_MAX_OUTPUT_CHARS} characters")
+            budget.check_time()
+            chunks.append(chunk)
+
+        return "".join(chunks)
+
+    finally:
+        _render_state.budget = None
+
+
+async def render_off_loop(render: Callable[..., str], *args) -> str:
+
+    # User templates render on a worker thread so a heavy one can't stall
+    # the event loop. The render budget stops the thread at the same
+    # deadline this stops waiting.
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(render, *args), settings.TEMPLATE_RENDER_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise SecurityError(f"Template took longer than {settings.TEMPLATE_RENDER_TIMEOUT_SECONDS:g}s to render")
+
+
+def invalidate(template_id: Hashable) -> None:
+    with _lock:
+        _compiled.pop(template_id, None)
+
+
+# Drop a user's compiled template as soon as its row changes
+@event.listens_for(Template, "after_update")
+@event.listens_for(Template, "after_delete")
+def _invalidate_template_row(mapper, connection, target) -> None:
+    invalidate(user_template_key(target.user_id, target.id))
@@ -0,0 +1,188 @@
+import asyncio
+import collections
+import json
+import os
+import tempfile
+import uuid
+from typing import Any, Dict, List, Optional
+
+# Settings are read when app.config is imported, so the test environment
+# is in place before anything from app is
+_workdir = tempfile.mkdtemp(prefix="job-copilot-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_workdir, 'test.db')}",
+    "JWT_SECRET": "test-secret",
+    "JWT_EXPIRATION_MINUTES": "60",
+    "GOOGLE_CLIENT_ID": "test-client",
+    "GOOGLE_CLIENT_SECRET": "test-secret",
+    "GEMINI_API_KEY": "test-key",
+    # Context caching would call the real API
+    "GEMINI_CONTEXT_CACHE_TTL_SECONDS": "0",
+    "TAILOR_CACHE_BACKEND": "memory",
+})
+
+import httpx
+import pytest
+from app.main import app
+from app.database import SessionLocal
+from app.models import User
+from app.services import ai_client, ai_service
+from app.services.auth import create_jwt
+from app.services.rate_limit import AdaptiveLimiter, TokenBucket
+from app.services.tailor_cache import MemoryCacheBackend, TailorCache
+
+
+RESUME_DATA = {
+    "contact": {"name": "Jane Doe", "email": "jane@example.com"},
+    "education": [{"school": "State U", "location": "Springfield", "degree": "BSc", "dates": "2016 - 2020"}],
+    "experience": [{
+        "company": "Acme & Sons",
+        "location": "Remote",
+        "title": "Engineer",
+        "dates": "2020 - Present",
+        "bullets": ["Cut p99 latency by 40%", "Ran the C# to Go migration"],
+    }],
+    "projects": [],
+    "skills": {"languages": "Python, Go"},
+}
+
+TAILOR_OUTPUT = {
+    "tailored_resume": "Jane Doe\nEngineer at Acme & Sons",
+    "resume_data": RESUME_DATA,
+    "changes_made": [],
+    "keywords_matched": ["Python"],
+    "keywords_missing": [],
+    "keyword_variants_used": [],
+    "clarifying_questions": [],
+}
+
+
+class FakeChunk:
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = [text]
+
+
+class FakeResponse:
+    """
+    A whole answer; iterating it gives the text in stream chunks, each
+    after chunk_latency seconds.
+    """
+
+    def __init__(self, text: str, chunk_latency: float = 0.0):
+        self.text = text
+        self.chunk_latency = chunk_latency
+        self.usage_metadata = None
+
+    async def __aiter__(self):
+        for start in range(0, len(self.text), 64):
+            await asyncio.sleep(self.chunk_latency)
+            yield FakeChunk(self.text[start:start + 64])
+
+
+class FakeGemini:
+    """
+    Stands in for the Gemini API behind genai.GenerativeModel. Call n
+    waits latencies[n] (or latency) and then raises errors[n] if there is
+    one, otherwise answers with text, streamed with chunk_latencies[n]
+    between chunks.
+    """
+
+    def __init__(self):
+        self.text = json.dumps(TAILOR_OUTPUT)
+        self.latency = 0.0
+        self.latencies: List[float] = []
+        self.errors: List[Optional[BaseException]] = []
+        self.chunk_latencies: List[float] = []
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def model(self, *args, **kwargs) -> "FakeModel":
+        return FakeModel(self)
+
+    async def respond(self, stream: bool) -> FakeResponse:
+        index = self.calls
+        self.calls += 1
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latencies[index] if index < len(self.latencies) else self.latency)
+        finally:
+            self.in_flight -= 1
+
+        if index < len(self.errors) and self.errors[index] is not None:
+            raise self.errors[index]
+
+        chunk_latency = self.chunk_latencies[index] if index < len(self.chunk_latencies) else 0.0
+        return FakeResponse(self.text, chunk_latency)
+
+
+class FakeModel:
+
+    def __init__(self, gemini: FakeGemini):
+        self.gemini = gemini
+
+    async def generate_content_async(self, prompt: str, stream: bool = False) -> FakeResponse:
+        return await self.gemini.respond(stream)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def gemini(monkeypatch) -> FakeGemini:
+
+    # A fresh fake and fresh client state for each test: no built models,
+    # no latency history, no concurrency limit lowered by an earlier test,
+    # and token buckets whose locks belong to this test's event loop
+    fake = FakeGemini()
+    monkeypatch.setattr(ai_client.genai, "GenerativeModel", fake.model)
+    monkeypatch.setattr(ai_client, "_models", {})
+    monkeypatch.setattr(ai_client, "_contexts", {})
+    monkeypatch.setattr(ai_client, "_latencies", collections.deque(maxlen=200))
+    monkeypatch.setattr(ai_client, "_requests", TokenBucket(ai_client.settings.GEMINI_RPM))
+    monkeypatch.setattr(ai_client, "_tokens", TokenBucket(ai_client.settings.GEMINI_TPM))
+    monkeypatch.setattr(ai_client, "_limiter", AdaptiveLimiter(
+        initial=ai_client.settings.GEMINI_MAX_CONCURRENCY,
+        minimum=ai_client.settings.GEMINI_MIN_CONCURRENCY,
+        maximum=ai_client.settings.GEMINI_MAX_CONCURRENCY,
+    ))
+    monkeypatch.setattr(ai_client.settings, "GEMINI_RETRY_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(ai_client.settings, "GEMINI_RETRY_MAX_SECONDS", 0.02)
+    monkeypatch.setattr(ai_service, "tailor_cache", TailorCache(MemoryCacheBackend(max_entries=64, ttl_seconds=60)))
+    return fake
+
+
+@pytest.fixture
+def user() -> User:
+
+    db = SessionLocal()
+    try:
+        sub = uuid.uuid4().hex
+        user = User(google_sub=sub, email=f"{sub}@example.com", name="Jane Doe")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def auth_headers(user: User) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_jwt(user.id, user.email)}"}
+
+
+@pytest.fixture
+async def client() -> Any:
+
+    # In-process requests; the app's lifespan (job workers, LaTeX) isn't started
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
@@ -0,0 +1,145 @@
+import asyncio
+import collections
+import math
+import threading
+import time
+import grpc
+import pytest
+from google.ai import generativelanguage_v1beta as glm
+from google.ai.generativelanguage_v1beta.services.generative_service.transports import GenerativeServiceGrpcAsyncIOTransport
+from google.generativeai import client as genai_client
+from app.services import ai_client
+from app.services.ai_client import generate_content
+from app.services.rate_limit import AdaptiveLimiter, TokenBucket
+
+
+pytestmark = pytest.mark.anyio
+
+CALLS = 24
+LATENCY = 0.1
+
+
+class GeminiStub:
+    """
+    A local gRPC server that answers GenerateContent like Gemini, after
+    LATENCY seconds. It runs on its own thread and event loop, so the
+    client under test only waits on the network, as it would in production.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.port = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._stopped: asyncio.Event
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._serve(),), daemon=True)
+
+    async def _generate_content(self, request, context):
+
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(LATENCY)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        return glm.GenerateContentResponse(candidates=[glm.Candidate(
+            content=glm.Content(role="model", parts=[glm.Part(text='{"ok": true}')]),
+            finish_reason=glm.Candidate.FinishReason.STOP,
+        )])
+
+    async def _serve(self):
+
+        server = grpc.aio.server()
+        server.add_generic_rpc_handlers([grpc.method_handlers_generic_handler(
+            "google.ai.generativelanguage.v1beta.GenerativeService",
+            {"GenerateContent": grpc.unary_unary_rpc_method_handler(
+                self._generate_content,
+                request_deserializer=glm.GenerateContentRequest.deserialize,
+                response_serializer=glm.GenerateContentResponse.serialize,
+            )},
+        )])
+        self.port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+
+        self._stopped = asyncio.Event()
+        self._ready.set()
+        await self._stopped.wait()
+        await server.stop(None)
+
+    def start(self) -> None:
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+        self._loop.close()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+
+    server = GeminiStub()
+    server.start()
+
+    # The SDK's own async client, talking gRPC to the stub instead of Google
+    def async_client():
+        channel = grpc.aio.insecure_channel(f"127.0.0.1:{server.port}")
+        return glm.GenerativeServiceAsyncClient(transport=GenerativeServiceGrpcAsyncIOTransport(channel=channel))
+
+    monkeypatch.setattr(genai_client, "get_default_generative_async_client", async_client)
+    monkeypatch.setattr(ai_client, "_latencies", collections.deque(maxlen=200))
+    monkeypatch.setattr(ai_client, "_requests", TokenBucket(ai_client.settings.GEMINI_RPM))
+    monkeypatch.setattr(ai_client, "_tokens", TokenBucket(ai_client.settings.GEMINI_TPM))
+
+    yield server
+    server.stop()
+
+
+async def _loop_lag(stop: asyncio.Event) -> float:
+
+    # Longest the event loop took to come back to a task that sleeps 10 ms
+    worst = 0.0
+    while not stop.is_set():
+        started = time.monotonic()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.monotonic() - started - 0.01)
+    return worst
+
+
+@pytest.mark.parametrize("limit", [2, 4, 8])
+async def test_throughput_scales_with_the_concurrency_limit(stub, monkeypatch, limit):
+
+    monkeypatch.setattr(ai_client.settings, "GEMINI_MAX_CONCURRENCY", limit)
+    monkeypatch.setattr(ai_client, "_limiter", AdaptiveLimiter(initial=limit, minimum=1, maximum=limit))
+    model = ai_client.genai.GenerativeModel("models/gemini-stub")
+
+    # Opens the channel, so the timed calls below don't pay for it
+    await generate_content(model, "warm up")
+    stub.calls = stub.max_in_flight = 0
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+
+    started = time.monotonic()
+    responses = await asyncio.gather(*[generate_content(model, f"prompt {index}") for index in range(CALLS)])
+    elapsed = time.monotonic() - started
+
+    stop.set()
+
+    # Calls run limit at a time, in ceil(CALLS / limit) rounds of one latency
+    rounds = math.ceil(CALLS / limit)
+    assert [response.text for response in responses] == ['{"ok": true}'] * CALLS
+    assert stub.calls == CALLS
+    assert stub.max_in_flight == limit
+    assert rounds * LATENCY <= elapsed < rounds * LATENCY + 0.25
+
+    # Waiting on Gemini never blocks the loop for other requests
+    assert await lag < 0.05
@@ -0,0 +1,139 @@
+import time
+import pytest
+from google.api_core.exceptions import InternalServerError, ResourceExhausted, ServiceUnavailable
+from app.services import ai_client
+from app.services.ai_client import GeminiRateLimited, generate_content, stream_content
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_retries_transient_errors(gemini):
+
+    gemini.errors = [ServiceUnavailable("unavailable"), InternalServerError("boom")]
+    retries = ai_client._retries
+
+    response = await generate_content(gemini.model(), "prompt")
+
+    assert response.text == gemini.text
+    assert gemini.calls == 3
+    assert ai_client._retries == retries + 2
+
+
+async def test_gives_up_after_max_attempts(gemini, monkeypatch):
+
+    monkeypatch.setattr(ai_client.settings, "GEMINI_MAX_ATTEMPTS", 3)
+    gemini.errors = [ServiceUnavailable("unavailable")] * 5
+
+    with pytest.raises(ServiceUnavailable):
+        await generate_content(gemini.model(), "prompt")
+
+    assert gemini.calls == 3
+
+
+async def test_does_not_retry_other_errors(gemini):
+
+    gemini.errors = [ValueError("bad request")]
+
+    with pytest.raises(ValueError):
+        await generate_content(gemini.model(), "prompt")
+
+    assert gemini.calls == 1
+
+
+async def test_slow_attempt_times_out_and_is_retried(gemini, monkeypatch):
+
+    monkeypatch.setattr(ai_client.settings, "GEMINI_ATTEMPT_TIMEOUT_SECONDS", 0.05)
+    gemini.latencies = [1.0, 0.0]
+
+    started = time.monotonic()
+    response = await generate_content(gemini.model(), "prompt")
+
+    assert response.text == gemini.text
+    assert gemini.calls == 2
+    assert time.monotonic() - started < 0.5
+
+
+async def test_quota_errors_shrink_the_limit_and_end_in_rate_limited(gemini, monkeypatch):
+
+    monkeypatch.setattr(ai_client.settings, "GEMINI_QUEUE_TIMEOUT_SECONDS", 0.1)
+    gemini.errors = [ResourceExhausted("quota")] * 5
+    limit = ai_client._limiter.limit
+
+    with pytest.raises(GeminiRateLimited) as raised:
+        await generate_content(gemini.model(), "prompt")
+
+    assert raised.value.retry_after > 0
+    assert ai_client._limiter.limit < limit
+
+
+async def test_hedge_answers_when_the_first_call_is_slow(gemini, monkeypatch):
+
+    monkeypatch.setattr(ai_client.settings, "GEMINI_HEDGE_ENABLED", True)
+    monkeypatch.setattr(ai_client.settings, "GEMINI_HEDGE_MIN_DELAY_SECONDS", 0.05)
+    ai_client._latencies.extend([0.01] * ai_client.HEDGE_MIN_SAMPLES)
+    gemini.latencies = [2.0, 0.0]
+    hedges, wins = ai_client._hedges, ai_client._hedge_wins
+
+    started = time.monotonic()
+    response = await generate_content(gemini.model(), "prompt")
+
+    assert response.text == gemini.text
+    assert time.monotonic() - started < 1.0
+    assert ai_client._hedges == hedges + 1
+    assert ai_client._hedge_wins == wins + 1
+
+
+async def test_no_hedge_without_enough_samples(gemini, monkeypatch):
+
+    monkeypatch.setattr(ai_client.settings, "GEMINI_HEDGE_ENABLED", True)
+    gemini.latencies = [0.1]
+
+    await generate_content(gemini.model(), "prompt")
+
+    assert gemini.calls == 1
+
+
+async def test_stream_retries_before_the_first_chunk(gemini):
+
+    gemini.errors = [ServiceUnavailable("unavailable")]
+
+    text = "".join([chunk async for chunk in stream_content(gemini.model(), "prompt")])
+
+    assert text == gemini.text
+    assert gemini.calls == 2
+
+
+async def test_stalled_stream_times_out_and_is_retried(gemini, monkeypatch):
+
+    monkeypatch.setattr(ai_client.settings, "GEMINI_ATTEMPT_TIMEOUT_SECONDS", 0.05)
+    gemini.chunk_latencies = [10.0, 0.0]
+
+    started = time.monotonic()
+    text = "".join([chunk async for chunk in stream_content(gemini.model(), "prompt")])
+
+    assert text == gemini.text
+    assert gemini.calls == 2
+    assert time.monotonic() - started < 0.5
+    assert ai_client._limiter.in_flight == 0
+
+
+async def test_tailor_route_maps_failures(gemini, client, auth_headers, monkeypatch):
+
+    monkeypatch.setattr(ai_client.settings, "GEMINI_QUEUE_TIMEOUT_SECONDS", 0.1)
+    request = {"job_description": "Backend engineer, Python", "master_resume": "Jane Doe"}
+
+    gemini.errors = [ServiceUnavailable("unavailable")]
+    response = await client.post("/resume/tailor", headers=auth_headers, json=request)
+    assert response.status_code == 200
+    assert "Acme" in response.json()["tailored_resume_latex"]
+
+    gemini.calls = 0
+    gemini.errors = [ResourceExhausted("quota")] * 5
+    response = await client.post(
+        "/resume/tailor",
+        headers={**auth_headers, "Cache-Control": "no-cache"},
+        json=request,
+    )
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
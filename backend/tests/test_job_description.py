@@ -0,0 +1,60 @@
+from app.config import settings
+from app.services.job_description import _is_heading, compact_job_description
+
+
+def test_short_bullets_repeated_across_sections_are_kept():
+
+    posting = "\n".join([
+        "Requirements:",
+        "- Python",
+        "- 3+ years building APIs",
+        "Nice to have:",
+        "- Python",
+        "- Kubernetes",
+    ])
+
+    lines = compact_job_description(posting).text.splitlines()
+
+    assert lines.count("- Python") == 2
+
+
+def test_repeated_paragraphs_are_kept_once():
+
+    paragraph = "We are a fast-growing fintech team building payment infrastructure for small businesses across Europe."
+    posting = f"{paragraph}\nRequirements:\n- Python\n{paragraph}"
+
+    assert compact_job_description(posting).text.count(paragraph) == 1
+
+
+def test_budget_keeps_requirements_over_company_filler(monkeypatch):
+
+    monkeypatch.setattr(settings, "JOB_DESCRIPTION_TOKEN_BUDGET", 200)
+    requirements = ["Strong Python skills", "Experience with Kubernetes", "Solid SQL experience"]
+    posting = "\n".join([
+        "Senior Backend Engineer",
+        "About us",
+        "We are a company. " * 60,
+        "Requirements",
+        *requirements,
+        "Benefits",
+        "We offer perks. " * 60,
+    ])
+
+    compacted = compact_job_description(posting)
+    lines = compacted.text.splitlines()
+
+    # Plain requirement lines are not headings, so they stay in the
+    # requirements section, which is filled before the filler
+    assert "Requirements" in lines
+    assert all(requirement in lines for requirement in requirements)
+    assert compacted.tokens_after <= 200
+
+
+def test_heading_needs_a_colon_or_a_whole_heading_phrase():
+
+    assert _is_heading("Requirements")
+    assert _is_heading("Preferred Qualifications")
+    assert _is_heading("What you'll do")
+    assert _is_heading("Tools we use:")
+    assert not _is_heading("Strong Python skills")
+    assert not _is_heading("Experience with Kubernetes")
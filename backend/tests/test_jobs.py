@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import func, select
+from app.database import AsyncSessionLocal
+from app.models import GenerationJob
+from app.services.auth import create_jwt
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/jobs/tailor", {"job_description": "Python engineer", "master_resume": "Ghost"}),
+    ("/jobs/cover-letter", {"job_description": "Python engineer", "master_resume": "Ghost"}),
+])
+async def test_jobs_need_an_existing_user(client, path, body):
+
+    user_id = 10 ** 9
+    headers = {"Authorization": f"Bearer {create_jwt(user_id, 'ghost@example.com')}"}
+
+    response = await client.post(path, headers=headers, json=body)
+    assert response.status_code == 401
+
+    async with AsyncSessionLocal() as db:
+        count = await db.scalar(select(func.count()).select_from(GenerationJob).where(GenerationJob.user_id == user_id))
+    assert count == 0
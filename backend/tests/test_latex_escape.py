@@ -0,0 +1,44 @@
+import random
+from app.services.latex_escape import escape_latex
+
+
+def _escape_latex_chained(text: str) -> str:
+
+    # The escaper as it was before the shared one: every replacement runs
+    if not text:
+        return text
+
+    replacements = [
+        ('\\', r'\textbackslash{}'),
+        ('&', r'\&'),
+        ('%', r'\%'),
+        ('$', r'\$'),
+        ('#', r'\#'),
+        ('_', r'\_'),
+        ('{', r'\{'),
+        ('}', r'\}'),
+        ('~', r'\textasciitilde{}'),
+        ('^', r'\textasciicircum{}'),
+    ]
+
+    for old, new in replacements:
+        text = text.replace(old, new)
+
+    return text
+
+
+def test_matches_the_chained_escaper_on_random_text():
+
+    rng = random.Random(20261018)
+    alphabet = "\\&%$#_{}~^" + "ab Z9.,-é\n"
+
+    for _ in range(20000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        assert escape_latex(text) == _escape_latex_chained(text), repr(text)
+
+
+def test_leaves_plain_text_and_empty_values_alone():
+
+    assert escape_latex("Cut p99 latency by 40 percent") == "Cut p99 latency by 40 percent"
+    assert escape_latex("") == ""
+    assert escape_latex(None) is None
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from sqlalchemy import func, select
+from app.database import AsyncSessionLocal, async_pool_metrics
+from app.models import Resume
+from app.services import resume_store
+from app.services.auth import create_jwt
+
+
+pytestmark = pytest.mark.anyio
+
+PARALLEL_SAVES = 20
+
+
+async def test_parallel_puts_leave_one_resume(client, auth_headers, user):
+
+    texts = [f"Jane Doe\nEngineer\nRevision {index}\n" for index in range(PARALLEL_SAVES)]
+
+    responses = await asyncio.gather(*[
+        client.put("/resume/master", headers=auth_headers, json={"raw_text": text})
+        for text in texts
+    ])
+
+    # No save loses the race on the unique user_id
+    assert [response.status_code for response in responses] == [200] * PARALLEL_SAVES
+    assert len({response.json()["id"] for response in responses}) == 1
+
+    async with AsyncSessionLocal() as db:
+        count = await db.scalar(select(func.count()).select_from(Resume).where(Resume.user_id == user.id))
+    assert count == 1
+
+    current = await client.get("/resume/master", headers=auth_headers)
+    assert current.json()["raw_text"] in texts
+
+    # Every save got its own version, and each one still rebuilds to the
+    # text that was sent
+    versions = (await client.get("/resume/master/versions", headers=auth_headers)).json()
+    numbers = sorted(version["version"] for version in versions)
+    assert numbers == list(range(1, PARALLEL_SAVES + 1))
+
+    rebuilt = []
+    for number in numbers:
+        response = await client.get(f"/resume/master/versions/{number}", headers=auth_headers)
+        rebuilt.append(response.json()["raw_text"])
+
+    assert sorted(rebuilt) == sorted(texts)
+    assert rebuilt[-1] == current.json()["raw_text"]
+
+
+async def test_put_returns_etag_that_get_honours(client, auth_headers):
+
+    saved = await client.put("/resume/master", headers=auth_headers, json={"raw_text": "Jane Doe"})
+    etag = saved.headers["ETag"]
+
+    response = await client.get("/resume/master", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+async def test_writes_need_an_existing_user(client):
+
+    headers = {"Authorization": f"Bearer {create_jwt(10 ** 9, 'ghost@example.com')}"}
+
+    response = await client.put("/resume/master", headers=headers, json={"raw_text": "Ghost"})
+    assert response.status_code == 401
+
+
+async def test_tailoring_from_the_saved_resume_holds_no_connection(client, auth_headers, user, gemini):
+
+    await client.put("/resume/master", headers=auth_headers, json={"raw_text": "Jane Doe\nEngineer"})
+    # Read from the database rather than this worker's resume cache
+    resume_store.invalidate_master_resume(user.id)
+    gemini.latency = 1.0
+
+    calls = [
+        client.post("/resume/tailor", headers=auth_headers, json={"job_description": f"Python engineer {index}"})
+        for index in range(5)
+    ]
+    pending = asyncio.gather(*calls)
+
+    # Every request has read the resume and is waiting on the model
+    while gemini.in_flight < 5:
+        await asyncio.sleep(0.01)
+    assert async_pool_metrics.checked_out == 0
+
+    responses = await pending
+    assert [response.status_code for response in responses] == [200] * 5
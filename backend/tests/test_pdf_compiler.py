@@ -0,0 +1,39 @@
+import asyncio
+import pytest
+from app.services.pdf_compiler import MB, PdfCompiler
+from app.services.ttl_cache import TTLCache
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_cache_is_bounded_by_bytes():
+
+    cache = TTLCache(max_entries=100, ttl_seconds=60, max_bytes=10)
+
+    cache.set("a", b"x" * 4)
+    cache.set("b", b"x" * 4)
+    cache.set("c", b"x" * 4)
+
+    # The least recently used entry makes room
+    assert cache.get("a") is None
+    assert cache.get("b") is not None and cache.get("c") is not None
+    assert cache.bytes == 8
+
+    cache.set("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.bytes == 8
+
+
+async def test_large_pdfs_are_not_cached(monkeypatch):
+
+    monkeypatch.setattr("app.services.pdf_compiler.settings.PDF_CACHE_MAX_PDF_MB", 1)
+    compiler = PdfCompiler(engine="pdflatex", workers=1, cache=TTLCache(max_entries=8, ttl_seconds=60, max_bytes=64 * MB))
+
+    for key, size in (("small", MB), ("large", MB + 1)):
+        done = asyncio.get_running_loop().create_future()
+        done.set_result(b"x" * size)
+        compiler._finish(key, done)
+
+    assert compiler.cache.get("small") is not None
+    assert compiler.cache.get("large") is None
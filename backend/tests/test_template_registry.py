@@ -0,0 +1,112 @@
+import time
+import pytest
+from jinja2.sandbox import SecurityError
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Template
+from app.services import template_registry
+from app.services.template_registry import (
+    CustomTemplate,
+    custom_template,
+    get_custom_template,
+    get_template,
+    render_custom,
+    render_off_loop,
+    user_template_key,
+    validate_template,
+)
+
+
+pytestmark = pytest.mark.anyio
+
+HOSTILE_TEMPLATES = [
+    # List concatenation inside sum() is quadratic and never returns to the template
+    "<% set x = range(45000)|map('string')|map('list')|list %><< x|sum(start=[])|length >>",
+    "<< range(99999)|map('string')|sort|unique|list|length >>",
+    "<< range(99999)|list|map('string')|list|map('list')|list|length >>",
+    "<% set s = 'x' * 1000000 %><< ([s] * 90000)|map('upper')|list|length >>",
+    "<< ([('x' * 1000000)] * 100000)|join|length >>",
+]
+
+
+def _custom(source: str) -> CustomTemplate:
+    return CustomTemplate(key=f"test:{source}", source=source, version="1")
+
+
+def test_compiled_template_is_reused_until_its_source_changes():
+
+    first = get_template("test:reuse", "Hello << name >>")
+
+    assert get_template("test:reuse", "Hello << name >>") is first
+    assert get_template("test:reuse", "Bye << name >>") is not first
+
+
+def test_saving_a_template_row_evicts_its_compiled_copy(user):
+
+    db = SessionLocal()
+    try:
+        row = Template(user_id=user.id, template_type="resume", content="Hello << name >>")
+        db.add(row)
+        db.commit()
+
+        compiled = get_custom_template(custom_template(row))
+        assert get_custom_template(custom_template(row)) is compiled
+
+        row.content = "Bye << name >>"
+        db.commit()
+
+        key = user_template_key(user.id, row.id)
+        assert key not in template_registry._compiled
+
+        updated = get_custom_template(custom_template(row))
+        assert updated is not compiled
+        assert updated.render(name="Jane") == "Bye Jane"
+
+        db.delete(row)
+        db.commit()
+        assert key not in template_registry._compiled
+
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("source", HOSTILE_TEMPLATES)
+async def test_hostile_template_stops_within_the_render_budget(source):
+
+    validate_template(source)
+
+    started = time.monotonic()
+    with pytest.raises(SecurityError):
+        await render_off_loop(render_custom, _custom(source))
+
+    assert time.monotonic() - started < settings.TEMPLATE_RENDER_TIMEOUT_SECONDS + 0.5
+
+
+async def test_bounded_filters_still_work():
+
+    source = (
+        "<< [1, 2, 3]|sum >> << [{'a': 2}, {'a': 3}]|sum(attribute='a') >> "
+        "<< [3, 1, 2]|sort|join(',') >> << ['b', 'a', 'b']|unique|join >> "
+        "<< 'abc'|reverse >> << [1, 2]|reverse|list >> << [4, 5]|max >>"
+    )
+
+    assert await render_off_loop(render_custom, _custom(source)) == "6 5 1,2,3 ba cba [2, 1] 5"
+
+
+def test_sum_only_adds_numbers():
+
+    with pytest.raises(SecurityError):
+        render_custom(_custom("<< [[1], [2]]|sum(start=[]) >>"))
+
+
+async def test_deadline_stops_filters_without_a_loop_limit(monkeypatch):
+
+    # With the iteration cap out of the way only the deadline is left
+    monkeypatch.setattr(settings, "TEMPLATE_MAX_LOOP_ITERATIONS", 10 ** 12)
+    source = "<% for i in range(99999) %><% for j in range(99999) %><< range(9)|list|max >><% endfor %><% endfor %>"
+
+    started = time.monotonic()
+    with pytest.raises(SecurityError):
+        await render_off_loop(render_custom, _custom(source))
+
+    assert time.monotonic() - started < settings.TEMPLATE_RENDER_TIMEOUT_SECONDS + 0.5
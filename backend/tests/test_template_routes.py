@@ -0,0 +1,23 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("content", [
+    "<< " + "(" * 5000 + "1" + ")" * 5000 + " >>",
+    "<% if true %>" * 3000 + "x" + "<% endif %>" * 3000,
+])
+async def test_deeply_nested_template_is_rejected(client, auth_headers, content):
+
+    response = await client.post("/template", headers=auth_headers, json={"template_type": "resume", "content": content})
+
+    assert response.status_code == 422
+    assert "nested too deeply" in response.json()["detail"]
+
+
+async def test_template_with_a_syntax_error_is_rejected(client, auth_headers):
+
+    response = await client.post("/template", headers=auth_headers, json={"template_type": "resume", "content": "<% if %>"})
+
+    assert response.status_code == 422
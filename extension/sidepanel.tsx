@@ -147,26 +147,7 @@ function IndexSidePanel() {
     setTailoredResult(null)
 
     try {
-      
-      // Get the user's master resume from backend
-      const resumeResponse = await fetch('http://localhost:8000/resume/master', {
-        method: 'GET',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        }
-      })
-
-      if (!resumeResponse.ok) {
-        if (resumeResponse.status === 404) {
-          throw new Error("Please upload your resume in the Resume tab first")
-        }
-        throw new Error("Failed to fetch your resume")
-      }
-
-      const resumeData = await resumeResponse.json()
-
-      // Call the tailor endpoint
+      // Call the tailor endpoint (the backend uses the saved master resume)
       const tailorResponse = await fetch('http://localhost:8000/resume/tailor', {
         method: 'POST',
         headers: {
@@ -174,11 +155,14 @@ function IndexSidePanel() {
           'Content-Type': 'application/json'
         },
         body: JSON.stringify({
-          job_description: jobData.jobText,
-          master_resume: resumeData.raw_text
+          job_description: jobData.jobText
         })
       })
 
+      if (tailorResponse.status === 404) {
+        throw new Error("Please upload your resume in the Resume tab first")
+      }
+
       if (!tailorResponse.ok) {
         const errorData = await tailorResponse.json()
         throw new Error(errorData.detail || "Failed to tailor resume")
@@ -204,23 +188,6 @@ function IndexSidePanel() {
     setCoverLetterResult(null)
 
     try {
-      const resumeResponse = await fetch('http://localhost:8000/resume/master', {
-        method: 'GET',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        }
-      })
-
-      if (!resumeResponse.ok) {
-        if (resumeResponse.status === 404) {
-          throw new Error("Please upload your resume in the Resume tab first")
-        }
-        throw new Error("Failed to fetch your resume")
-      }
-
-      const resumeData = await resumeResponse.json()
-
       const coverLetterResponse = await fetch('http://localhost:8000/cover-letter/generate', {
         method: 'POST',
         headers: {
@@ -229,12 +196,15 @@ function IndexSidePanel() {
         },
         body: JSON.stringify({
           job_description: jobData.jobText,
-          master_resume: resumeData.raw_text,
           company_name: "",
           job_title: jobData.title || ""
         })
       })
 
+      if (coverLetterResponse.status === 404) {
+        throw new Error("Please upload your resume in the Resume tab first")
+      }
+
       if (!coverLetterResponse.ok) {
         const errorData = await coverLetterResponse.json()
         throw new Error(errorData.detail || "Failed to generate cover letter")